@@ -0,0 +1,95 @@
+import http.client
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+
+# Časový limit pro navázání spojení i pro každé čtení ze socketu (v sekundách)
+TIMEOUT = 20
+
+# Počet opakování po přechodné chybě a základ exponenciálního odkladu mezi nimi (v sekundách)
+RETRIES = 2
+BACKOFF = 1.0
+
+# Po kolika chybách v řadě se kanál dočasně vyřadí a na jak dlouho (při dalších chybách se doba zdvojnásobuje)
+FAILURE_THRESHOLD = 3
+COOLDOWN = 30 * 60
+MAX_COOLDOWN = 24 * 60 * 60
+
+# Váha posledního měření v klouzavém průměru doby stažení
+LATENCY_SMOOTHING = 0.3
+
+
+# Přechodné chyby, po kterých má smysl požadavek zopakovat (časový limit, přerušené spojení, 429 a 5xx)
+def is_retryable(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    if isinstance(error, urllib.error.URLError):
+        return isinstance(error.reason, OSError)
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+# Zavolání funkce s opakováním po přechodných chybách; odklad roste exponenciálně s náhodným rozptylem,
+# aby se opakované požadavky na tentýž server nesešly ve stejný okamžik
+def with_retries(func, *args, retries=RETRIES, backoff=BACKOFF, **kwargs):
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+# Zdraví kanálů - chyby v řadě, poslední úspěch, průměrná doba stažení; kanál, který opakovaně selhává,
+# se přeskakuje až do konce vychladnutí (circuit breaker), potom se jednou zkusí znovu
+class FeedHealth:
+    def __init__(self, state=None):
+        self.state = state if state is not None else {}
+        self.lock = threading.Lock()
+
+    # Smí se kanál teď stahovat?
+    def allow(self, feed_url, now=None):
+        with self.lock:
+            return self.state.get(feed_url, {}).get('open_until', 0) <= (now or time.time())
+
+    def record_success(self, feed_url, latency, now=None):
+        with self.lock:
+            record = self.state.setdefault(feed_url, {})
+            record['failures'] = 0
+            record.pop('open_until', None)
+            record.pop('last_error', None)
+            record['last_success'] = now or time.time()
+            record['latency'] = round(LATENCY_SMOOTHING * latency +
+                                      (1 - LATENCY_SMOOTHING) * record.get('latency', latency), 3)
+
+    # Záznam chyby; vrací čas, do kdy se kanál přeskakuje (nebo None, pokud se ještě nevyřadil)
+    def record_failure(self, feed_url, error, now=None):
+        now = now or time.time()
+        with self.lock:
+            record = self.state.setdefault(feed_url, {})
+            record['failures'] = record.get('failures', 0) + 1
+            record['last_failure'] = now
+            record['last_error'] = str(error)
+            if record['failures'] < FAILURE_THRESHOLD:
+                return None
+            cooldown = min(MAX_COOLDOWN, COOLDOWN * 2 ** (record['failures'] - FAILURE_THRESHOLD))
+            record['open_until'] = now + cooldown
+            return record['open_until']
+
+
+def load_health(file_name):
+    if os.path.exists(file_name):
+        try:
+            with open(file_name, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def save_health(state, file_name):
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=4)
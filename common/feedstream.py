@@ -0,0 +1,82 @@
+import xml.etree.ElementTree as ET
+import feedparser
+from httpclient import MAX_DECODED_SIZE, ResponseTooLarge, decompressor
+
+# Velikost bloku čteného ze sítě
+CHUNK_SIZE = 64 * 1024
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+RSS1 = '{http://purl.org/rss/1.0/}'
+
+# Elementy s jednou položkou kanálu (RSS 2.0, RSS 1.0, Atom)
+ENTRY_TAGS = {'item', RSS1 + 'item', ATOM + 'entry'}
+
+# Obálky pro jednu položku podle formátu kanálu - feedparser pak položku zpracuje stejně jako v celém kanálu
+WRAPPERS = {
+    'item': ('<rss version="2.0"><channel>', '</channel></rss>'),
+    RSS1 + 'item': ('<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/">',
+                    '</rdf:RDF>'),
+    ATOM + 'entry': ('<feed xmlns="http://www.w3.org/2005/Atom">', '</feed>'),
+}
+
+
+# Kanál, který nejde zpracovat proudově (není správně utvořené XML, nepodporované kódování...) -
+# volající ho zpracuje přes feedparser
+class FeedStreamError(Exception):
+    pass
+
+
+# Postupné čtení těla odpovědi po blocích s rozbalením podle Content-Encoding (s limitem velikosti
+# po rozbalení); on_read(počet bajtů) dostává velikost každého přeneseného bloku
+def iter_body(response, on_read=None, chunk_size=CHUNK_SIZE, max_size=MAX_DECODED_SIZE):
+    decoder = decompressor(response.headers.get('Content-Encoding'))
+    decoded = 0
+    while True:
+        chunk = response.read(chunk_size)
+        if not chunk:
+            break
+        if on_read:
+            on_read(len(chunk))
+        data = decoder.decompress(chunk) if decoder else chunk
+        decoded += len(data)
+        if decoded > max_size:
+            raise ResponseTooLarge(f"odpověď po rozbalení přesahuje {max_size} B")
+        yield data
+    if decoder:
+        yield decoder.flush()
+
+
+# Převod elementu položky na položku feedparseru - element se zpracuje feedparserem samostatně, takže HTML
+# obsahu projde stejným čištěním (sanitizer) a relativní adresy se doplní podle adresy kanálu base_url
+# stejně jako při zpracování celého kanálu; paměť i čas tak závisí jen na velikosti položky
+def entry_from_element(element, base_url=None):
+    prefix, suffix = WRAPPERS[element.tag]
+    document = prefix + ET.tostring(element, encoding='unicode') + suffix
+    headers = {'content-location': base_url} if base_url else {}
+    entries = feedparser.parse(document.encode('utf-8'), response_headers=headers).entries
+    if not entries:
+        raise FeedStreamError(f"položku {element.tag} nejde zpracovat")
+    return entries[0]
+
+
+# Proudové parsování kanálu z bloků bajtů - položky se vrací jedna po druhé hned, jak jsou celé načtené,
+# a zpracované elementy se ze stromu odstraňují, takže paměť nezávisí na velikosti kanálu.
+# Při chybě parsování vyvolá FeedStreamError (i uprostřed kanálu, po již vrácených položkách)
+def iter_entries(chunks, base_url=None):
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    parents = []
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == 'start':
+                    parents.append(element)
+                    continue
+                parents.pop()
+                if element.tag in ENTRY_TAGS:
+                    yield entry_from_element(element, base_url)
+                    if parents:
+                        parents[-1].remove(element)
+        parser.close()
+    except (ET.ParseError, ValueError, LookupError) as e:
+        raise FeedStreamError(str(e)) from e
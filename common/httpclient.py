@@ -0,0 +1,266 @@
+import http.client
+import os
+import threading
+import urllib.error
+import zlib
+from urllib.parse import urljoin, urlsplit
+from feedparser import USER_AGENT
+from feedhealth import TIMEOUT
+
+try:
+    import brotli  # Volitelné - bez modulu brotli se komprese br serveru nenabízí
+except ImportError:
+    brotli = None
+
+# Kolik nečinných spojení na jeden server se drží otevřených pro další požadavky
+MAX_IDLE_PER_HOST = 4
+
+# Nejvyšší povolená velikost přenesené odpovědi a velikost po rozbalení (v bajtech)
+MAX_RESPONSE_SIZE = 20 * 1024 * 1024
+MAX_DECODED_SIZE = 100 * 1024 * 1024
+
+# Velikost bloku při čtení celé odpovědi
+READ_BLOCK_SIZE = 64 * 1024
+
+MAX_REDIRECTS = 5
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli else 'gzip, deflate'
+
+
+# Odpověď je větší než povolený limit
+class ResponseTooLarge(Exception):
+    pass
+
+
+# Rozbalovač pro hodnotu Content-Encoding (None, pokud tělo není komprimované); metody decompress() a flush()
+def decompressor(encoding):
+    encoding = (encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return DeflateDecompressor()
+    if encoding == 'br' and brotli:
+        return BrotliDecompressor()
+    return None
+
+
+class BrotliDecompressor:
+    def __init__(self):
+        self.decompressor = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self.decompressor.process(data)
+
+    def flush(self):
+        return b''
+
+
+# Content-Encoding deflate má být podle RFC zabalený ve formátu zlib, část serverů ale posílá holý deflate -
+# formát se pozná podle hlavičky zlib v prvních dvou bajtech (stejně se k tomu chová i feedparser)
+class DeflateDecompressor:
+    def __init__(self):
+        self.decompressor = None
+        self.pending = b''
+
+    def _start(self):
+        data, self.pending = self.pending, b''
+        zlib_header = len(data) >= 2 and data[0] & 0x0f == 8 and (data[0] << 8 | data[1]) % 31 == 0
+        self.decompressor = zlib.decompressobj(zlib.MAX_WBITS if zlib_header else -zlib.MAX_WBITS)
+        return data
+
+    def decompress(self, data, max_length=0):
+        if self.decompressor is None:
+            self.pending += data
+            if len(self.pending) < 2:
+                return b''
+            data = self._start()
+        return self.decompressor.decompress(data, max_length)
+
+    @property
+    def unconsumed_tail(self):
+        return self.decompressor.unconsumed_tail if self.decompressor else b''
+
+    def flush(self):
+        if self.decompressor is None:
+            data = self._start()
+            return self.decompressor.decompress(data) + self.decompressor.flush()
+        return self.decompressor.flush()
+
+
+# Rozbalení celého těla odpovědi podle Content-Encoding s kontrolou velikosti po rozbalení
+def decode_body(body, encoding, max_size=MAX_DECODED_SIZE):
+    decoder = decompressor(encoding)
+    if decoder is None:
+        return body
+    if isinstance(decoder, BrotliDecompressor):
+        decoded = decoder.decompress(body)
+    else:
+        decoded = decoder.decompress(body, max_size + 1)
+        if not decoder.unconsumed_tail:
+            decoded += decoder.flush()
+    if len(decoded) > max_size or getattr(decoder, 'unconsumed_tail', b''):
+        raise ResponseTooLarge(f"odpověď po rozbalení přesahuje {max_size} B")
+    return decoded
+
+
+# Odpověď ze sdíleného spojení - čtení počítá přenesené bajty a hlídá limit velikosti;
+# po přečtení celého těla se spojení vrátí do poolu, jinak se zavře
+class PooledResponse:
+    def __init__(self, client, key, connection, response, url):
+        self.client = client
+        self.key = key
+        self.connection = connection
+        self.response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.received = 0
+
+    # Celé tělo se čte po blocích, aby se nadměrná odpověď nenačetla do paměti celá, než se limit zkontroluje
+    def read(self, amt=None):
+        if amt is not None:
+            return self._read_block(amt)
+        blocks = []
+        while True:
+            block = self._read_block(min(READ_BLOCK_SIZE, self.client.max_size + 1 - self.received))
+            if not block:
+                return b''.join(blocks)
+            blocks.append(block)
+
+    def _read_block(self, amt):
+        data = self.response.read(amt)
+        self.received += len(data)
+        self.client._count('bytes', len(data))
+        if self.received > self.client.max_size:
+            self.close()
+            raise ResponseTooLarge(f"odpověď {self.url} přesahuje {self.client.max_size} B")
+        return data
+
+    def close(self):
+        if self.connection is None:
+            return
+        if self.response.length == 0:
+            self.response.read()  # Odpověď bez těla (např. 304) - spojení lze použít znovu
+        if self.response.isclosed() and not self.response.will_close:
+            self.client._release(self.key, self.connection)
+        else:
+            self.response.close()
+            self.connection.close()
+        self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Sdílený HTTP klient - pool spojení keep-alive pro každý server (jedno DNS vyhledání a TLS handshake
+# pro všechny kanály téhož serveru), vyjednání komprese, limit velikosti odpovědi a počítadla
+# požadavků, spojení a bajtů. Bezpečný pro více vláken
+class HttpClient:
+    def __init__(self, timeout=TIMEOUT, max_size=MAX_RESPONSE_SIZE, max_idle_per_host=MAX_IDLE_PER_HOST,
+                 user_agent=USER_AGENT):
+        self.timeout = timeout
+        self.max_size = max_size
+        self.max_idle_per_host = max_idle_per_host
+        self.user_agent = user_agent
+        self.lock = threading.Lock()
+        self.idle = {}
+        self.stats = {'requests': 0, 'connections': 0, 'reused': 0, 'bytes': 0}
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    # Potomek procesu nesmí používat spojení zděděná od rodiče
+    def _reset_after_fork(self):
+        self.lock = threading.Lock()
+        self.idle = {}
+
+    # Kopie počítadel - požadavky, nově otevřená a znovu použitá spojení, přenesené bajty
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def _count(self, name, value=1):
+        with self.lock:
+            self.stats[name] += value
+
+    def _acquire(self, key):
+        with self.lock:
+            connections = self.idle.get(key)
+            if connections:
+                self.stats['reused'] += 1
+                return connections.pop(), True
+            self.stats['connections'] += 1
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def _release(self, key, connection):
+        with self.lock:
+            connections = self.idle.setdefault(key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def _send(self, url, headers):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = {'User-Agent': self.user_agent, 'Accept-Encoding': ACCEPT_ENCODING, **(headers or {})}
+        while True:
+            connection, reused = self._acquire(key)
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused:
+                    continue  # Server mezitím zavřel nečinné spojení - zkusí se nové
+                raise
+            except Exception:
+                connection.close()
+                raise
+            return PooledResponse(self, key, connection, response, url)
+
+    # Otevření odpovědi ke čtení po částech; přesměrování se sledují, chybové stavy (4xx, 5xx)
+    # vyvolají urllib.error.HTTPError, 304 se vrací jako běžná odpověď
+    def open(self, url, headers=None):
+        self._count('requests')
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send(url, headers)
+            content_length = response.headers.get('Content-Length')
+            if response.status in REDIRECT_CODES and response.headers.get('Location'):
+                response.read()
+                response.close()
+                url = urljoin(url, response.headers['Location'])
+                continue
+            if response.status >= 400:
+                response.read()
+                response.close()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            if content_length and content_length.isdigit() and int(content_length) > self.max_size:
+                response.close()
+                raise ResponseTooLarge(f"odpověď {url} má {content_length} B, limit je {self.max_size} B")
+            return response
+        raise urllib.error.HTTPError(url, 310, 'Too many redirects', response.headers, None)
+
+    # Stažení celé odpovědi - vrací stav, hlavičky, rozbalené tělo a počet přenesených bajtů
+    def get(self, url, headers=None):
+        with self.open(url, headers) as response:
+            body = response.read()
+        return (response.status, response.headers, decode_body(body, response.headers.get('Content-Encoding')),
+                response.received)
+
+    def close(self):
+        with self.lock:
+            connections = [connection for idle in self.idle.values() for connection in idle]
+            self.idle = {}
+        for connection in connections:
+            connection.close()
+
+
+# Klient sdílený v rámci procesu
+default_client = HttpClient()
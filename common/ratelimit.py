@@ -0,0 +1,75 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+
+# Token bucket - průměrně rate požadavků za sekundu, nejvýše burst požadavků najednou. Počítá se jako GCRA:
+# místo zásoby tokenů se drží teoretický čas příštího požadavku, takže každý požadavek dostane vlastní termín
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.interval = 1.0 / rate
+        self.tolerance = (burst - 1) * self.interval
+        self.next_time = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    # Rezervace termínu pro jeden požadavek; vrací, kolik sekund je potřeba počkat, než se smí odeslat
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            next_time = max(self.next_time, now, self.blocked_until)
+            self.next_time = next_time + self.interval
+            return max(0.0, next_time - self.tolerance - now, self.blocked_until - now)
+
+    # Kolik sekund ještě trvá pozdržení serveru po 429
+    def blocked_for(self):
+        with self.lock:
+            return max(0.0, self.blocked_until - time.monotonic())
+
+    # Server požádal o zpomalení (429, Retry-After) - do daného okamžiku se nic neposílá
+    def block(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+# Omezovač požadavků s vlastním token bucketem pro každý server
+class HostRateLimiter:
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlsplit(url).hostname
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    # Čekání, až smí odejít další požadavek na server daného URL
+    def acquire(self, url):
+        bucket = self.bucket(url)
+        wait = bucket.reserve()
+        while wait > 0:
+            time.sleep(wait)
+            # Pozdržení po 429 přišlo až během čekání - rezervuje se nový termín po jeho konci
+            wait = bucket.reserve() if bucket.blocked_for() > 0 else 0
+
+    def block(self, url, seconds):
+        self.bucket(url).block(seconds)
+
+
+# Hodnota hlavičky Retry-After v sekundách (počet sekund nebo datum); None, pokud chybí nebo je neplatná
+def retry_after_seconds(headers):
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,120 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+from itertools import groupby
+from datetime import datetime
+import pytz
+from store import ArticleStore
+
+# Adresář se segmenty archivu
+ARCHIVE_DIR = 'archiv'
+
+# Kolik posledních měsíců zůstává v databázi a jak dlouho se segmenty archivu uchovávají
+HOT_MONTHS = 3
+RETENTION_MONTHS = 36
+
+# Po kolika článcích se archivované články mažou z databáze
+DELETE_BATCH = 10000
+
+
+# Začátek měsíce posunutý o daný počet měsíců zpět
+def month_start(date, months_back=0):
+    month_index = date.year * 12 + date.month - 1 - months_back
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=pytz.UTC)
+
+
+def month_key(timestamp):
+    return datetime.fromtimestamp(timestamp, pytz.UTC).strftime('%Y-%m')
+
+
+# Segmenty jednoho měsíce: rss-obsah-YYYY-MM.N.jsonl.gz - uzavřený segment se už nikdy nepřepisuje,
+# pozdě došlé články stejného měsíce se zapíšou do dalšího segmentu
+def segment_files(archive_dir, month='*'):
+    return sorted(glob.glob(os.path.join(archive_dir, f'rss-obsah-{month}.*.jsonl.gz')))
+
+
+# Zápis jednoho segmentu (atomicky přes dočasný soubor)
+def write_segment(archive_dir, month, articles):
+    os.makedirs(archive_dir, exist_ok=True)
+    file_name = os.path.join(archive_dir, f'rss-obsah-{month}.{len(segment_files(archive_dir, month)) + 1}.jsonl.gz')
+    with gzip.open(file_name + '.tmp', 'wt', encoding='utf-8') as f:
+        for article in articles:
+            f.write(json.dumps(article, ensure_ascii=False) + '\n')
+    os.replace(file_name + '.tmp', file_name)
+    return file_name
+
+
+# Přesun článků starších než HOT_MONTHS měsíců z databáze do komprimovaných měsíčních segmentů;
+# články se čtou seřazené podle data, takže se každý měsíc zapisuje proudově. Z databáze se pak smažou
+# jen články, které se opravdu zapsaly - článek uložený během zápisu segmentů (sledování, pracovníci
+# ingest.py, backfill) zůstane v databázi do příští archivace
+def compact(store, archive_dir=ARCHIVE_DIR, hot_months=HOT_MONTHS, vacuum=True):
+    cutoff = month_start(datetime.now(pytz.UTC), hot_months).timestamp()
+    archived_ids = []
+
+    def archived_articles():
+        for row in store.conn.execute('SELECT * FROM articles WHERE published_ts < ? ORDER BY published_ts', (cutoff,)):
+            article = store._from_row(row)
+            archived_ids.append(article.pop('id'))
+            duplicate_of = article.pop('duplicate_of')
+            article['duplicate'] = duplicate_of is not None
+            article['group'] = duplicate_of or archived_ids[-1]  # Skupina téměř shodných zpráv (id první zprávy)
+            yield article
+
+    written = [write_segment(archive_dir, month, articles)
+               for month, articles in groupby(archived_articles(), key=lambda article: month_key(article['published_ts']))]
+    with store.conn:
+        for start in range(0, len(archived_ids), DELETE_BATCH):
+            batch = json.dumps(archived_ids[start:start + DELETE_BATCH])
+            for table, column in (('article_bands', 'article_id'), ('article_terms', 'article_id'), ('articles', 'id')):
+                store.conn.execute(f'DELETE FROM {table} WHERE {column} IN (SELECT value FROM json_each(?))', (batch,))
+    if vacuum and written:
+        store.conn.execute('VACUUM')
+    for file_name in written:
+        print(f"Archivováno: {file_name}")
+    return written
+
+
+# Smazání segmentů starších než RETENTION_MONTHS měsíců
+def apply_retention(archive_dir=ARCHIVE_DIR, retention_months=RETENTION_MONTHS):
+    oldest = month_start(datetime.now(pytz.UTC), retention_months).strftime('%Y-%m')
+    removed = []
+    for file_name in segment_files(archive_dir):
+        if os.path.basename(file_name)[len('rss-obsah-'):][:7] < oldest:
+            os.remove(file_name)
+            removed.append(file_name)
+            print(f"Smazáno: {file_name}")
+    return removed
+
+
+# Proudové čtení archivovaných článků v rozmezí - otevírají se jen segmenty měsíců, které rozmezí překrývá
+def iter_archived(start_date, end_date, archive_dir=ARCHIVE_DIR):
+    first, last = start_date.strftime('%Y-%m'), end_date.strftime('%Y-%m')
+    start_ts, end_ts = start_date.timestamp(), end_date.timestamp()
+    for file_name in segment_files(archive_dir):
+        if not first <= os.path.basename(file_name)[len('rss-obsah-'):][:7] <= last:
+            continue
+        with gzip.open(file_name, 'rt', encoding='utf-8') as f:
+            for line in f:
+                article = json.loads(line)
+                if start_ts <= article['published_ts'] <= end_ts:
+                    yield article
+
+
+# Spuštění: python archive.py [--hot-months 3] [--retention-months 36] [--db rss-obsah.db]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivace starých článků do komprimovaných měsíčních segmentů")
+    parser.add_argument('--db', default='rss-obsah.db', help="databáze článků")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help="adresář se segmenty archivu")
+    parser.add_argument('--hot-months', type=int, default=HOT_MONTHS, help="kolik měsíců ponechat v databázi")
+    parser.add_argument('--retention-months', type=int, default=RETENTION_MONTHS,
+                        help="po kolika měsících segmenty mazat (0 = nemazat)")
+    args = parser.parse_args()
+
+    store = ArticleStore(args.db)
+    compact(store, args.archive_dir, args.hot_months)
+    store.close()
+    if args.retention_months:
+        apply_retention(args.archive_dir, args.retention_months)
@@ -0,0 +1,202 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+import pytz
+import mediacheck
+from keywords import keywords
+
+# Velikosti archivu, pro které se měří
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# Slova a věty pro generování realistického českého a slovenského textu
+WORDS = (
+    'vláda parlament ministr poslanci opozice koalice prezident volby rozpočet zákon návrh soud policie '
+    'nemocnice škola obec kraj starosta hasiči počasí doprava dálnice energie ceny inflace mzdy důchody '
+    'vojna armáda hranica ľudia správy mesto krajina rokovanie poslanec strana hnutie médiá novinári '
+    'Ukrajina Rusko Evropská unie NATO Brusel Praha Bratislava Brno Košice Ostrava Slovensko Česko '
+    'uviedol podľa informácie dnes včera zajtra uvedl podle informací dnes včera zítra oznámil uviedla'
+).split()
+KEYWORD_HINTS = [key for key in keywords if len(key) > 3]
+
+
+# Náhodná věta, občas s klíčovým slovem
+def random_sentence(rng, length):
+    words = [rng.choice(WORDS) for _ in range(length)]
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(KEYWORD_HINTS) + rng.choice(['', 'ace', 'ích', 'y']))
+    return ' '.join(words).capitalize() + '.'
+
+
+# Vygenerování syntetického RSS nebo Atom kanálu
+def generate_feed(rng, name, entries, now, atom=False):
+    items = []
+    for index in range(entries):
+        published = now - timedelta(minutes=index * 37)
+        title = escape(random_sentence(rng, rng.randint(5, 12)))
+        summary = escape('<p>' + ' '.join(random_sentence(rng, rng.randint(8, 20)) for _ in range(3)) +
+                         ' <a href="https://example.cz/">Více&nbsp;zde</a></p>')
+        link = f'https://{name}.example.cz/clanek/{index}'
+        if atom:
+            items.append(f'<entry><title>{title}</title><link href="{link}"/><id>{link}</id>'
+                         f'<published>{published.isoformat()}</published><summary type="html">{summary}</summary></entry>')
+        else:
+            items.append(f'<item><title>{title}</title><link>{link}</link><guid>{link}</guid>'
+                         f'<pubDate>{format_datetime(published)}</pubDate><description>{summary}</description></item>')
+    if atom:
+        return f'<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom"><title>{name}</title>{"".join(items)}</feed>'
+    return f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>{name}</title>{"".join(items)}</channel></rss>'
+
+
+# Vygenerování archivu článků dané velikosti (rovnoměrně rozložených do minulosti)
+def generate_archive(rng, size, now):
+    articles = []
+    for index in range(size):
+        published = now - timedelta(days=7) - timedelta(minutes=index * 13)
+        title = random_sentence(rng, rng.randint(5, 12))
+        content = title + ' ' + random_sentence(rng, rng.randint(20, 40))
+        source = f'zdroj{index % 40}.example.cz'
+        articles.append({
+            'title': title,
+            'link': f'https://{source}/archiv/{index}',
+            'published': format_datetime(published),
+            'published_ts': published.timestamp(),
+            'content': content,
+            'source': source,
+            'keywords': mediacheck.classify_article(content, source, keywords),
+        })
+    return articles
+
+
+# Obsluha HTTP požadavků bez výpisu do konzole
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+# Lokální HTTP server, který obsluhuje vygenerované kanály
+@contextlib.contextmanager
+def serve_directory(directory):
+    handler = partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# Změření jednoho kroku
+def timed(results, archive_size, stage, func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    seconds = time.perf_counter() - start
+    items = len(value) if hasattr(value, '__len__') else None
+    results.append({'archive_size': archive_size, 'stage': stage, 'seconds': round(seconds, 6), 'items': items})
+    print(f"{archive_size:>7} {stage:<20} {seconds:9.3f} s" + (f"  ({items} položek)" if items is not None else ''))
+    return value
+
+
+# Verze kódu, pro kterou se měří (aby šly výsledky porovnávat mezi verzemi)
+def code_version():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# Měření všech kroků pro jednu velikost archivu
+def run_benchmark(base_url, feed_names, workdir, archive_size, rng, now, results):
+    feeds = [f'{base_url}/{name}' for name in feed_names]
+    start_date = now - timedelta(days=1)
+    end_date = now
+    store_file = os.path.join(workdir, f'bench-{archive_size}.db')
+    output_file = os.path.join(workdir, f'monitoring-{archive_size}.md')
+    for file_name in (store_file, mediacheck.get_cache_file_name(store_file)):
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+    archive = generate_archive(rng, archive_size, now)
+    store = mediacheck.ArticleStore(store_file)
+    timed(results, archive_size, 'store_insert', store.add_articles, archive)
+
+    # Samostatně měřené dílčí kroky: stažení a parsování kanálů, vyhledávání klíčových slov
+    def fetch_parse():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return mediacheck.fetch_all_feeds(feeds, start_date, end_date, keywords)
+
+    articles = timed(results, archive_size, 'fetch_parse', fetch_parse)
+    contents = [article['content'] for article in articles]
+    timed(results, archive_size, 'keywords', lambda: [mediacheck.contains_keywords(text, keywords) for text in contents])
+
+    # Celý běh jako v mediacheck.py: aktualizace úložiště, filtrování a výstup
+    def update_store():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return mediacheck.update_rss_content_file(feeds, store, start_date, end_date)
+
+    def write_output():
+        mediacheck.save_articles_to_file(filtered, output_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            mediacheck.display_articles_to_console(filtered)
+        return filtered
+
+    first_stage = len(results)
+    timed(results, archive_size, 'update_store', update_store)
+    filtered = timed(results, archive_size, 'filter', mediacheck.filter_monitored_articles, store, start_date, end_date)
+    timed(results, archive_size, 'output', write_output)
+    total = sum(result['seconds'] for result in results[first_stage:])
+    results.append({'archive_size': archive_size, 'stage': 'end_to_end', 'seconds': round(total, 6), 'items': len(filtered)})
+    print(f"{archive_size:>7} {'end_to_end':<20} {total:9.3f} s")
+    store.close()
+
+
+# Spuštění: python benchmark.py [--sizes 1000 10000] [--feeds 40] [--entries 100] [--output bench-results.json]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark zpracování RSS kanálů v mediacheck")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="velikosti archivu článků")
+    parser.add_argument('--feeds', type=int, default=40, help="počet syntetických kanálů")
+    parser.add_argument('--entries', type=int, default=100, help="počet položek v jednom kanálu")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench-results.json', help="soubor s výsledky ve formátu JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.now(pytz.UTC).replace(microsecond=0)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        feed_names = []
+        for index in range(args.feeds):
+            name = f'kanal{index}.{"atom" if index % 4 == 0 else "rss"}'
+            with open(os.path.join(workdir, name), 'w', encoding='utf-8') as f:
+                f.write(generate_feed(rng, f'kanal{index}', args.entries, now, atom=index % 4 == 0))
+            feed_names.append(name)
+
+        with serve_directory(workdir) as base_url:
+            for archive_size in args.sizes:
+                run_benchmark(base_url, feed_names, workdir, archive_size, rng, now, results)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': code_version(),
+            'created': datetime.now(pytz.UTC).isoformat(),
+            'python': platform.python_version(),
+            'feeds': args.feeds,
+            'entries_per_feed': args.entries,
+            'results': results,
+        }, f, ensure_ascii=False, indent=4)
+    print(f"Výsledky uloženy do {args.output}")
@@ -0,0 +1,41 @@
+import calendar
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from dateutil.parser import parse as dateparse
+import pytz
+
+
+# Převod na UTC; datum bez časové zóny se bere jako UTC
+def to_utc(date):
+    if date.tzinfo is None:
+        return date.replace(tzinfo=pytz.UTC)
+    return date.astimezone(pytz.UTC)
+
+
+# Rychlé parsování řetězce s datem - nejdřív RFC 822 (RSS), pak ISO 8601 (Atom), až nakonec obecný dateutil
+def parse_date(date_str):
+    date_str = date_str.strip()
+    if date_str[:1].isdigit():
+        try:
+            return to_utc(datetime.fromisoformat(date_str))
+        except ValueError:
+            pass
+    else:
+        try:
+            return to_utc(parsedate_to_datetime(date_str))
+        except (TypeError, ValueError, IndexError):
+            pass
+    return to_utc(dateparse(date_str))
+
+
+# Datum publikace položky z feedparseru - přednostně z již naparsované struktury published_parsed
+def parse_entry_date(entry):
+    parsed = entry.get('published_parsed')
+    if parsed:
+        return datetime.fromtimestamp(calendar.timegm(parsed), pytz.UTC)
+    return parse_date(entry.published)
+
+
+# Převod data publikace na UTC timestamp
+def published_timestamp(published):
+    return parse_date(published).timestamp()
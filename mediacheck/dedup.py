@@ -0,0 +1,78 @@
+import hashlib
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Parametry URL, které jen sledují původ návštěvy a nemění obsah
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'rss', 'amp'}
+TRACKING_PREFIXES = ('utm_', 'at_', 'pk_', 'xtor')
+
+# Prefixy mobilních a AMP verzí webů
+HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+
+# SimHash - 64bitový otisk rozdělený na 8 pásem po 8 bitech pro LSH index. Kandidáti musí sdílet
+# alespoň jedno pásmo; otisky s Hammingovou vzdáleností do MAX_DISTANCE se tak najdou s pravděpodobností
+# kolem 90 % a přitom se porovnávají jen s několika procenty článků z časového okna
+SIMHASH_BITS = 64
+BANDS = [(shift, 8) for shift in range(0, SIMHASH_BITS, 8)]
+MAX_DISTANCE = 10
+
+# Jak daleko od sebe (v sekundách) mohou být publikované duplicity téže zprávy
+DUPLICATE_WINDOW = 3 * 24 * 60 * 60
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+# Kanonický tvar URL - bez sledovacích parametrů, fragmentu, www/mobilních prefixů a AMP přípon
+def canonical_url(url):
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    path = re.sub(r'/amp/?$|\.amp$', '', parsed.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunparse(('https', host, path, '', urlencode(query), ''))
+
+
+# Malá písmena bez diakritiky
+def fold_text(text):
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+# SimHash textu z dvojic slov (u jednoslovných textů ze samotného slova); prázdný text má otisk 0
+def simhash(text):
+    tokens = TOKEN_RE.findall(fold_text(text))
+    shingles = [' '.join(tokens[i:i + 2]) for i in range(len(tokens) - 1)] or tokens
+    if not shingles:
+        return 0
+    # Bit otisku je 1, pokud je 1 ve většině hashů - sloupce bitů se sčítají přes zip nad binárními řetězci
+    rows = [format(int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'),
+                   f'0{SIMHASH_BITS}b') for shingle in shingles]
+    half = len(rows) / 2
+    return int(''.join('1' if column.count('1') > half else '0' for column in zip(*rows)), 2)
+
+
+# Hodnoty pásem otisku pro LSH index
+def simhash_bands(fingerprint):
+    return [(band, fingerprint >> shift & ((1 << width) - 1)) for band, (shift, width) in enumerate(BANDS)]
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+# SQLite ukládá jen 64bitová čísla se znaménkem
+def to_signed(fingerprint):
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
@@ -0,0 +1,44 @@
+# Seznam RSS kanálů pro monitoring
+feeds = [
+    'https://hlidacipes.org/feed/',
+    'https://www.irozhlas.cz/rss/irozhlas/tag/7708693',
+    'https://denikn.cz/minuta/feed/',
+    'https://dennikn.sk/minuta/feed',
+    'https://dennikn.sk/rss/',
+    'https://denikn.cz/rss/',
+    'https://www.mvcr.cz/chh/SCRIPT/rss.aspx?nid=',
+    'https://cedmohub.eu/cs/feed/',
+    'https://europeanvalues.cz/cs/feed/',
+    #'https://demagog.cz/rss/index.atom', - Zatím vypnu, cedmohub postuje jak AFP, tak Demagog, tak aby nebylo 2x
+    'https://www.voxpot.cz/feed/',
+    'https://www.aktuality.sk/rss/',
+    'https://zpravy.aktualne.cz/rss/',
+    'https://www.seznamzpravy.cz/rss',
+    'https://www.irozhlas.cz/rss/irozhlas/section/zpravy-domov',
+    'https://www.irozhlas.cz/rss/irozhlas/section/zpravy-svet',
+    'https://www.lupa.cz/rss/clanky/',
+    'https://www.denik.cz/rss/zpravy.html',
+    'https://www.novinky.cz/rss',
+    'https://euractiv.cz/feed/',
+    'https://euractiv.sk/feed/',
+    'https://cc.cz/feed/',
+    'https://www.ceskenoviny.cz/sluzby/rss/cr.php',
+    'https://www.ceskenoviny.cz/sluzby/rss/svet.php',
+    'https://www.zive.cz/rss/sc-47/',
+    'https://servis.idnes.cz/rss.aspx?c=zpravodaj',
+    'https://ct24.ceskatelevize.cz/rss/tema/hlavni-zpravy-84313',
+    'https://domaci.hn.cz/?m=rss',
+    'https://zahranicni.hn.cz/?m=rss',
+    'https://www.investigace.cz/feed/',
+    'https://www.sme.sk/rss-title',
+    'https://spravy.rtvs.sk/feed/',
+    'https://www.respekt.cz/api/rss?type=articles&unlocked=1',
+    'https://refresher.cz/rss',
+    'https://refresher.sk/rss',
+    'https://www.tyzden.sk/feed/',
+    'https://hnonline.sk/feed',
+    'http://www.teraz.sk/rss/slovensko.rss',
+    'http://www.teraz.sk/rss/zahranicie.rss',
+    'https://www.topky.sk/rss/8/topky'
+    # Přidejte další RSS kanály podle potřeby
+]
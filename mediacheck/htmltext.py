@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+from html.entities import html5
+from html.parser import HTMLParser
+
+# Obsah těchto tagů BeautifulSoup do textu nezahrnuje
+SKIPPED_TAGS = {'script', 'style', 'template', 'rt', 'rp'}
+
+# Tagy, ve kterých BeautifulSoup nezkracuje bílé znaky
+PRESERVE_WHITESPACE_TAGS = {'pre', 'textarea'}
+
+# Prázdné elementy - zavírají se hned po otevření a jejich koncový tag se ignoruje
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta', 'param',
+             'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'}
+
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+# Proudový převod HTML na text bez stavění stromu - vrací stejný text jako BeautifulSoup(..., 'html.parser').get_text().
+# Otevřené tagy se evidují stejně jako v BeautifulSoup: koncový tag zavře poslední otevřený tag stejného jména
+# i všechny tagy otevřené po něm, koncový tag bez otevřeného tagu se ignoruje
+class TextExtractor(HTMLParser):
+    def __init__(self):
+        # Entity se převádějí ručně, aby se chovaly stejně jako v BeautifulSoup
+        super().__init__(convert_charrefs=False)
+        self.parts = []
+        self.pending = []
+        self.open_tags = []
+        self.closed_void_tags = []
+        self.skip_depth = 0
+        self.preserve_depth = 0
+
+    # Ukončení jednoho textového uzlu
+    def flush(self):
+        if not self.pending:
+            return
+        data = ''.join(self.pending)
+        self.pending = []
+        if not self.skip_depth:
+            self.append_text(data)
+
+    # Přidání textového uzlu - text tvořený jen bílými znaky se mimo <pre> a <textarea> zkrátí na jeden znak
+    def append_text(self, data):
+        if not self.preserve_depth and not data.strip(ASCII_SPACES):
+            data = '\n' if '\n' in data else ' '
+        self.parts.append(data)
+
+    def push_tag(self, tag):
+        self.open_tags.append(tag)
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth += 1
+
+    def pop_to_tag(self, tag):
+        if tag not in self.open_tags:
+            return
+        while True:
+            closed = self.open_tags.pop()
+            if closed in SKIPPED_TAGS:
+                self.skip_depth -= 1
+            elif closed in PRESERVE_WHITESPACE_TAGS:
+                self.preserve_depth -= 1
+            if closed == tag:
+                return
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        self.push_tag(tag)
+        if tag in VOID_TAGS:
+            self.pop_to_tag(tag)
+            self.closed_void_tags.append(tag)  # Případný pozdější koncový tag se ignoruje
+
+    def handle_startendtag(self, tag, attrs):
+        self.flush()
+        self.push_tag(tag)
+        self.pop_to_tag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.closed_void_tags:
+            self.closed_void_tags.remove(tag)  # Ignorovaný koncový tag neukončuje ani textový uzel
+        else:
+            self.flush()
+            self.pop_to_tag(tag)
+
+    def handle_data(self, data):
+        self.pending.append(data)
+
+    def handle_entityref(self, name):
+        # Neznámá entita zůstává jako text "&name" (bez středníku), stejně jako v BeautifulSoup
+        self.handle_data(html5.get(name + ';', '&' + name))
+
+    def handle_charref(self, name):
+        try:
+            code = int(name[1:], 16) if name[:1] in ('x', 'X') else int(name)
+        except ValueError:
+            return
+        if 128 <= code <= 159:
+            # Znaky 128-159 se v praxi posílají ve windows-1252
+            char = bytes([code]).decode('windows-1252', errors='replace')
+        elif 0 < code < 0x110000 and not 0xD800 <= code <= 0xDFFF:
+            char = chr(code)
+        else:
+            char = '\ufffd'
+        self.handle_data(char)
+
+    # Komentáře, deklarace a instrukce se do textu nepřidávají, jen ukončují textový uzel
+    def handle_comment(self, data):
+        self.flush()
+
+    def handle_decl(self, decl):
+        self.flush()
+
+    def handle_pi(self, data):
+        self.flush()
+
+    # CDATA je samostatný textový uzel, který BeautifulSoup do textu zahrnuje i uvnitř vynechávaných tagů
+    def unknown_decl(self, data):
+        self.flush()
+        if data.upper().startswith('CDATA['):
+            self.append_text(data[6:])
+
+    def close(self):
+        super().close()
+        self.flush()
+
+
+# Funkce pro převod HTML na prostý text
+def html_to_text(html):
+    extractor = TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return ''.join(extractor.parts)
+
+
+# Soubor s ukázkami souhrnů z kanálů a okrajovými případy pro porovnání s BeautifulSoup
+SAMPLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'htmltext-samples.json')
+
+# Části HTML, ze kterých se skládají náhodné dokumenty pro porovnání
+FUZZ_PARTS = ['<p>', '</p>', '<b>', '</b>', '<br>', '<br/>', '<script>', '</script>', '<style>', '</style>',
+              '<template>', '</template>', '<pre>', '</pre>', '<textarea>', '</textarea>', '<!-- x -->', '<!DOCTYPE html>',
+              '<?pi?>', '<![CDATA[ c ]]>', '<![cdata[]]>', '<rt>', '</rt>', '<rp>', '</img>', '</br>', '<pre/>',
+              '<template/>', '&amp;', '&nbsp;', '&foo;', '&lt', '&#150;', '&#x9F;', '&#0;', '&#xD800;',
+              '&#;', '<a href="x">', '</a>', '<', '>', ' ', '  ', '\n', '\t', '\r\n', '\xa0', 'text', 'Žluťoučký kůň']
+
+
+# Náhodný dokument z ukázek a částí HTML (se zadaným seedem je vždy stejný)
+def fuzz_document(rng, samples):
+    parts = [rng.choice(FUZZ_PARTS) if rng.random() < 0.8 else rng.choice(samples) for _ in range(rng.randint(1, 30))]
+    return ''.join(parts)
+
+
+# Porovnání s BeautifulSoup(..., 'html.parser').get_text() na ukázkách, náhodných dokumentech a zadaných souborech:
+#   python htmltext.py [--fuzz 20000] [--seed 1] [soubor.html ...]
+# Při rozdílu skončí s chybovým kódem
+if __name__ == "__main__":
+    import argparse
+    import random
+    import warnings
+    from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+    warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)  # Ukázky obsahují i <?xml ...?>
+
+    parser = argparse.ArgumentParser(description="Porovnání html_to_text s BeautifulSoup")
+    parser.add_argument('files', nargs='*', help="další HTML soubory k porovnání")
+    parser.add_argument('--samples', default=SAMPLES_FILE, help="soubor s ukázkami (JSON seznam)")
+    parser.add_argument('--fuzz', type=int, default=20000, help="počet náhodných dokumentů")
+    parser.add_argument('--seed', type=int, default=1, help="seed pro náhodné dokumenty")
+    args = parser.parse_args()
+
+    with open(args.samples, 'r', encoding='utf-8') as f:
+        samples = json.load(f)
+    rng = random.Random(args.seed)
+    documents = [(f'ukázka {index}', html) for index, html in enumerate(samples)]
+    documents += [(f'náhodný dokument {index}', fuzz_document(rng, samples)) for index in range(args.fuzz)]
+    for file_name in args.files:
+        with open(file_name, 'r', encoding='utf-8') as f:
+            documents.append((file_name, f.read()))
+
+    differences = 0
+    for name, html in documents:
+        expected = BeautifulSoup(html, 'html.parser').get_text()
+        if html_to_text(html) != expected:
+            differences += 1
+            print(f"Rozdíl oproti BeautifulSoup: {name}: {html!r}")
+    print(f"Porovnáno dokumentů: {len(documents)}, rozdílů: {differences}")
+    sys.exit(1 if differences else 0)
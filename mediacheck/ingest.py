@@ -0,0 +1,99 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+import pytz
+from keywords import keywords
+from jobqueue import JobQueue
+from mediacheck import default_feeds, fetch_rss, load_feeds, open_article_store
+
+# Výchozí soubor fronty úloh
+QUEUE_FILE = 'rss-jobs.db'
+
+# Jak dlouho pracovník čeká, než se znovu podívá do prázdné fronty (při --wait)
+POLL_INTERVAL = 5
+
+
+# Pracovník - přebírá úlohy z fronty, kanál stáhne, zpracuje a otaguje a články zapíše do sdíleného úložiště.
+# Zápis je idempotentní (úložiště přeskakuje již uložené odkazy), takže úlohu lze bez obav zopakovat;
+# stav kanálu se ukládá až po zápisu článků a úloha se dokončí až nakonec
+def run_worker(queue_file, db_file, stream=False, wait=False):
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    queue = JobQueue(queue_file)
+    store = open_article_store(db_file)
+    processed = 0
+    try:
+        while True:
+            job = queue.claim(worker_id)
+            if job is None:
+                if wait or queue.unfinished():
+                    time.sleep(POLL_INTERVAL)  # Úlohy jiných pracovníků se ještě můžou vrátit do fronty
+                    continue
+                break
+            feed_url = job['feed_url']
+            start_date = datetime.fromtimestamp(job['payload']['start'], pytz.UTC)
+            end_date = datetime.fromtimestamp(job['payload']['end'], pytz.UTC)
+            cache = {feed_url: queue.load_feed_state(feed_url)}
+            try:
+                articles = fetch_rss(feed_url, start_date, end_date, keywords, cache, stream=stream)
+                new_articles = store.add_articles(articles)
+            except Exception as e:
+                print(f"[{worker_id}] Chyba při stahování {feed_url}: {e}")
+                queue.fail(job['id'], worker_id, e)
+                continue
+            queue.save_feed_state(feed_url, cache[feed_url])
+            queue.complete(job['id'], worker_id)
+            processed += 1
+            print(f"[{worker_id}] {feed_url}: {len(new_articles)} nových článků")
+    finally:
+        store.close()
+        queue.close()
+    return processed
+
+
+def parse_day(value, end=False):
+    day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=pytz.UTC)
+    return day + timedelta(days=1, microseconds=-1) if end else day
+
+
+# Spuštění:
+#   python ingest.py enqueue [--from 2024-05-01] [--to 2024-05-31] [--feeds-file kanaly.txt]  - koordinátor zařadí úlohy
+#   python ingest.py work [--workers 4] [--wait]                                              - pracovníci je zpracují
+#   python ingest.py status
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rozdělené stahování kanálů přes frontu úloh")
+    parser.add_argument('command', choices=['enqueue', 'work', 'status'])
+    parser.add_argument('--queue', default=QUEUE_FILE, help="soubor fronty úloh (SQLite)")
+    parser.add_argument('--db', default='rss-obsah.db', help="databáze článků")
+    parser.add_argument('--from', dest='start', help="počáteční datum YYYY-MM-DD (výchozí dnes)")
+    parser.add_argument('--to', dest='end', help="koncové datum YYYY-MM-DD (výchozí dnes)")
+    parser.add_argument('--feeds-file', help="soubor se seznamem kanálů, jeden na řádek (výchozí feeds.py)")
+    parser.add_argument('--run-id', help="označení běhu; stejný běh se nezařadí dvakrát (výchozí čas zařazení)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="počet pracovních procesů")
+    parser.add_argument('--wait', action='store_true', help="po vyprázdnění fronty čekat na další úlohy")
+    parser.add_argument('--stream', action='store_true', help="parsovat kanály proudově")
+    args = parser.parse_args()
+
+    if args.command == 'enqueue':
+        now = datetime.now(pytz.UTC)
+        start_date = parse_day(args.start) if args.start else now.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date = parse_day(args.end, end=True) if args.end else now.replace(hour=23, minute=59, second=59, microsecond=999999)
+        feeds = load_feeds(args.feeds_file) if args.feeds_file else default_feeds
+        run_id = args.run_id or now.strftime('%Y-%m-%dT%H:%M:%S')
+        queue = JobQueue(args.queue)
+        added = queue.enqueue(run_id, feeds, {'start': start_date.timestamp(), 'end': end_date.timestamp()})
+        print(f"Běh {run_id}: zařazeno {added} úloh")
+        queue.close()
+    elif args.command == 'work':
+        open_article_store(args.db, "rss-obsah.json").close()  # Schéma a případný import jen jednou, ne v každém procesu
+        workers = [multiprocessing.Process(target=run_worker, args=(args.queue, args.db, args.stream, args.wait))
+                   for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    queue = JobQueue(args.queue)
+    print(', '.join(f"{status}: {count}" for status, count in sorted(queue.counts().items())) or "Fronta je prázdná")
+    queue.close()
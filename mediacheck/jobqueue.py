@@ -0,0 +1,127 @@
+import contextlib
+import json
+import sqlite3
+import time
+
+# Jak dlouho (v sekundách) patří převzatá úloha pracovníkovi; po vypršení ji může převzít jiný
+LEASE_SECONDS = 5 * 60
+
+# Po kolika neúspěšných pokusech se úloha vzdá
+MAX_ATTEMPTS = 3
+
+
+# Trvalá fronta úloh stahování kanálů v SQLite - úlohy se přebírají s pronájmem (lease), takže úloha
+# pracovníka, který spadl, se po vypršení pronájmu vrátí do fronty. Frontu může sdílet více procesů
+# (i na více strojích se sdíleným úložištěm); převzetí úlohy je atomické díky BEGIN IMMEDIATE
+class JobQueue:
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.conn = sqlite3.connect(file_name, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                feed_url TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                error TEXT,
+                created REAL,
+                finished REAL,
+                UNIQUE (run_id, feed_url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_expires);
+            CREATE TABLE IF NOT EXISTS feed_state (
+                feed_url TEXT PRIMARY KEY,
+                state TEXT
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    # Zařazení úloh pro jeden běh; opakované zařazení téhož běhu nic nezdvojí
+    def enqueue(self, run_id, feed_urls, payload=None):
+        now = time.time()
+        with self._transaction():
+            cursor = self.conn.executemany(
+                'INSERT OR IGNORE INTO jobs (run_id, feed_url, payload, created) VALUES (?, ?, ?, ?)',
+                [(run_id, feed_url, json.dumps(payload), now) for feed_url in feed_urls])
+        return cursor.rowcount
+
+    # Převzetí další čekající úlohy (nebo úlohy s vypršelým pronájmem); vrací None, pokud žádná není
+    def claim(self, worker_id, lease_seconds=LEASE_SECONDS):
+        now = time.time()
+        with self._transaction():
+            # Pracovník spadl i při posledním povoleném pokusu - úloha se už nezopakuje
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'pronájem vypršel' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?", (now, MAX_ATTEMPTS))
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "AND attempts < ? ORDER BY id LIMIT 1", (now, MAX_ATTEMPTS)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?", (worker_id, now + lease_seconds, row['id']))
+        job = dict(row)
+        job['payload'] = json.loads(row['payload']) if row['payload'] else None
+        job['attempts'] += 1
+        return job
+
+    # Dokončení úlohy - zapíše se jen tehdy, když pronájem stále patří tomuto pracovníkovi
+    def complete(self, job_id, worker_id):
+        with self._transaction():
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'done', finished = ?, error = NULL WHERE id = ? AND lease_owner = ? "
+                "AND status = 'leased'", (time.time(), job_id, worker_id)).rowcount == 1
+
+    # Neúspěšný pokus - úloha se vrátí do fronty, po MAX_ATTEMPTS pokusech se označí jako chybná
+    def fail(self, job_id, worker_id, error):
+        with self._transaction():
+            return self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL, finished = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (MAX_ATTEMPTS, str(error), time.time(), job_id, worker_id)).rowcount == 1
+
+    # Počty úloh podle stavu (volitelně jen pro jeden běh)
+    def counts(self, run_id=None):
+        sql = 'SELECT status, COUNT(*) AS count FROM jobs'
+        params = []
+        if run_id is not None:
+            sql += ' WHERE run_id = ?'
+            params.append(run_id)
+        return {row['status']: row['count'] for row in self.conn.execute(sql + ' GROUP BY status', params)}
+
+    # Úlohy, které ještě můžou doběhnout (čekající nebo převzaté)
+    def unfinished(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased') AND attempts < ?",
+            (MAX_ATTEMPTS,)).fetchone()[0]
+
+    # Stav kanálu sdílený mezi pracovníky (ETag, Last-Modified, zpracovaná ID položek)
+    def load_feed_state(self, feed_url):
+        row = self.conn.execute('SELECT state FROM feed_state WHERE feed_url = ?', (feed_url,)).fetchone()
+        return json.loads(row['state']) if row else {}
+
+    def save_feed_state(self, feed_url, state):
+        with self._transaction():
+            self.conn.execute('INSERT OR REPLACE INTO feed_state (feed_url, state) VALUES (?, ?)',
+                              (feed_url, json.dumps(state, ensure_ascii=False)))
+
+    # Zápisová transakce - BEGIN IMMEDIATE zamkne databázi hned, takže dva pracovníci nepřevezmou stejnou úlohu
+    @contextlib.contextmanager
+    def _transaction(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import re
+
+# Klíče, u kterých záleží na velikosti písmen (jinak by "AI" chytalo např. "mail")
+CASE_SENSITIVE_KEYS = ["AI", "MAGA"]
+
+
+# Předkompilovaný vyhledávač klíčových slov - celý slovník je spojen do jednoho regulárního výrazu,
+# takže text se prochází jen jednou bez ohledu na počet klíčů
+class KeywordMatcher:
+    def __init__(self, keywords, case_sensitive_keys=CASE_SENSITIVE_KEYS):
+        self.keywords = dict(keywords)
+        self.version = keywords_version(self.keywords)
+        self.order = {key: index for index, key in enumerate(self.keywords)}
+        case_sensitive = [key for key in self.keywords if key in case_sensitive_keys]
+        case_insensitive = [key for key in self.keywords if key not in case_sensitive_keys]
+        lowered = [key.lower() for key in case_insensitive]
+        self.prefixes_ci = self._prefixes(case_insensitive, str.lower)
+        self.prefixes_cs = self._prefixes(case_sensitive, lambda key: key)
+        # Klíče bez ohledu na velikost písmen se hledají v textu převedeném na malá písmena;
+        # varianta s IGNORECASE slouží jen pro texty, kde lower() mění délku (a tím pozice shod)
+        self.pattern_ci = self._compile(lowered, 0)
+        self.pattern_ci_fallback = self._compile(lowered, re.IGNORECASE)
+        self.pattern_cs = self._compile(case_sensitive, 0)
+
+    # Klíče se složí do stromu (trie), aby regulární výraz na každé pozici větvil jen podle dalšího znaku
+    @staticmethod
+    def _trie_pattern(keys):
+        trie = {}
+        for key in keys:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        def build(node):
+            terminal = '' in node
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # Greedy volitelná skupina - na každé pozici se najde nejdelší klíč
+            return '(?:' + body + ')?' if terminal else body
+
+        return build(trie)
+
+    # Lookahead umožňuje najít i překrývající se klíče
+    @classmethod
+    def _compile(cls, keys, flags):
+        if not keys:
+            return None
+        return re.compile('(?=(' + cls._trie_pattern(set(keys)) + '))', flags)
+
+    # Pro každý klíč seznam klíčů, které jsou jeho prefixem - všechny začínají na stejné pozici
+    @staticmethod
+    def _prefixes(keys, normalize):
+        normalized = {normalize(key): key for key in keys}
+        return {
+            text: [key for prefix, key in normalized.items() if text.startswith(prefix)]
+            for text in normalized
+        }
+
+    @staticmethod
+    def _scan(pattern, text, prefixes, normalize, matches):
+        if pattern is None:
+            return
+        for match in pattern.finditer(text):
+            start = match.start()
+            for key in prefixes.get(normalize(match.group(1)), ()):
+                matches.append((key, start, start + len(key)))
+
+    # Vrací seznam shod (klíč, kategorie, začátek, konec) seřazený podle pozice v textu
+    def find(self, text):
+        matches = []
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            self._scan(self.pattern_ci, lowered, self.prefixes_ci, str, matches)
+        else:
+            self._scan(self.pattern_ci_fallback, text, self.prefixes_ci, str.lower, matches)
+        self._scan(self.pattern_cs, text, self.prefixes_cs, str, matches)
+        matches.sort(key=lambda m: (m[1], self.order[m[0]]))
+        return [(key, self.keywords[key], start, end) for key, start, end in matches]
+
+    # Vrací kategorie nalezených klíčů ve stejném pořadí jako slovník (jedna položka za každý nalezený klíč)
+    def categories(self, text):
+        found = {key for key, _, _, _ in self.find(text)}
+        return [full_word for key, full_word in self.keywords.items() if key in found]
+
+
+# Verze slovníku klíčových slov - hash jeho obsahu včetně pořadí (pořadí určuje pořadí kategorií)
+def keywords_version(keywords):
+    data = json.dumps(list(keywords.items()), ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
@@ -1,30 +1,71 @@
+import argparse
 import feedparser
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-from dateutil.parser import parse as dateparse
 import pytz
 import json
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from urllib.parse import urlparse
 from keywords import keywords  # Import keywords from keywords.py
+from feeds import feeds as default_feeds
+from matcher import KeywordMatcher
+from store import ArticleStore
+from dates import parse_entry_date
+from htmltext import html_to_text
+from metrics import RunMetrics, profile_to
+from watch import FeedScheduler, watch_feeds
+from archive import ARCHIVE_DIR, iter_archived
+from render import FORMATS, load_render_state, save_render_state, write_articles
+
+# Společné moduly pro mediacheck i telegram
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'common'))
+from feedstream import FeedStreamError, iter_body, iter_entries
+from feedhealth import FeedHealth, with_retries
+from httpclient import decode_body, default_client as http_client
+
+# Maximální počet současně stahovaných kanálů a maximum současných požadavků na jeden server
+MAX_WORKERS = 16
+MAX_PER_HOST = 2
+
+# Konec rozmezí při průběžném sledování
+WATCH_END = datetime(9999, 12, 31, tzinfo=pytz.UTC)
+
+# Kolik posledních ID položek si pamatujeme pro každý kanál
+MAX_SEEN_IDS = 1000
+
+# Po kolika položkách seřazených sestupně podle data považujeme kanál za seřazený (pro předčasné ukončení)
+MIN_ORDERED_ENTRIES = 3
+
+# Zkompilované vyhledávače pro jednotlivé slovníky klíčových slov (podle id slovníku, spolu se slovníkem samotným)
+_matchers = {}
+
+# Vrací vyhledávač pro daný slovník, kompiluje se jen jednou pro každý objekt slovníku - kontrola je tak
+# nezávislá na velikosti slovníku. Uložený odkaz na slovník brání tomu, aby jeho id dostal jiný objekt
+def get_matcher(keywords):
+    cached = _matchers.get(id(keywords))
+    if cached is None or cached[0] is not keywords:
+        cached = _matchers[id(keywords)] = (keywords, KeywordMatcher(keywords))
+    return cached[1]
 
 # Funkce pro kontrolu, zda článek obsahuje daná klíčová slova
 def contains_keywords(text, keywords):
-    found_keywords = []
-    for key, full_word in keywords.items():
-        if key in ["AI", "MAGA"]:  # Kontrola "AI" a "MAGA"
-            if key in text:
-                found_keywords.append(full_word)
-        else:
-            if key.lower() in text.lower():  # Hledání bez ohledu na velikost písmen
-                found_keywords.append(full_word)
-    return found_keywords
+    return get_matcher(keywords).categories(text)
+
+# Zařazení článku do kategorií podle klíčových slov a zdroje
+def classify_article(content, source, keywords):
+    keywords_found = contains_keywords(content, keywords)  # Přidáno pro kontrolu klíčových slov
+    if source == 'cedmohub.eu':  # Pokud je zdroj cedmohub.eu, nastavit klíčové slovo na fact-checking
+        keywords_found.append('fact-checking')
+    return keywords_found if keywords_found else ['N/A']
 
 # Funkce pro získání textu z entry summary
 def get_summary_text(entry):
     summary_text = entry.summary if 'summary' in entry else ''
     if '<' in summary_text and '>' in summary_text:  # Kontrola, zda obsahuje HTML značky
-        return BeautifulSoup(summary_text, 'html.parser').get_text()
+        return html_to_text(summary_text)  # Stejný výstup jako BeautifulSoup(...).get_text(), bez stavění stromu
     return summary_text
 
 # Funkce pro získání názvu serveru z URL (bez 'www.')
@@ -35,39 +76,264 @@ def get_server_name(url):
         netloc = netloc[4:]
     return netloc
 
-# Načtení a filtrování článků z RSS kanálů
-def fetch_rss(feed_url, start_date, end_date, keywords):
+# Otevření kanálu ke čtení; vrací (HTTP status, odpověď ke čtení nebo None při 304, hlavičky)
+def open_feed(feed_url, etag=None, modified=None):
+    headers = {}
+    # Podmíněný požadavek - server vrátí 304, pokud se kanál od minula nezměnil
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
+    # Sdílený klient drží spojení keep-alive pro kanály téhož serveru
+    response = http_client.open(feed_url, headers)
+    if response.status == 304:
+        response.close()
+        return 304, None, response.headers
+    return response.status, response, response.headers
+
+# Stažení celého kanálu - vrací stav, rozbalené tělo, hlavičky a počet přenesených bajtů
+def download_feed(feed_url, etag=None, modified=None):
+    status, response, response_headers = open_feed(feed_url, etag, modified)
+    if response is None:
+        return 304, b'', response_headers, 0
+    with response:
+        body = response.read()
+    return status, decode_body(body, response_headers.get('Content-Encoding')), response_headers, response.received
+
+# Zpracování staženého kanálu feedparserem; relativní odkazy se doplní podle adresy kanálu
+def parse_feed(feed_url, body, headers):
+    headers = {key.lower(): value for key, value in headers.items()}
+    headers.setdefault('content-location', feed_url)
+    return feedparser.parse(body, response_headers=headers)
+
+# Proudové čtení položek kanálu po blocích, položky jsou k dispozici ještě před koncem stahování.
+# Kanál, který nejde zpracovat proudově, se stáhne znovu celý, zpracuje feedparserem (vrátí se jen dosud
+# nevrácené položky) a příště se už proudově nezkouší
+def stream_entries(feed_url, response, feed_cache, metrics):
+    returned = set()
+    try:
+        with response:
+            for entry in iter_entries(iter_body(response, lambda size: metrics.record_feed(feed_url, bytes=size)), feed_url):
+                returned.add(entry.get('id', entry.get('link')))
+                yield entry
+    except FeedStreamError as e:
+        print(f"Kanál {feed_url} nejde zpracovat proudově ({e}), použije se feedparser")
+        feed_cache['stream'] = False
+        status, body, headers, transferred = with_retries(download_feed, feed_url)
+        metrics.record_feed(feed_url, bytes=transferred)
+        for entry in parse_feed(feed_url, body, headers).entries:
+            if entry.get('id', entry.get('link')) not in returned:
+                yield entry
+
+# Výběr a otagování položek kanálu publikovaných v rozmezí; položky s ID v seen_ids se přeskočí a ID nových
+# článků se do seen_ids doplní. U kanálu seřazeného od nejnovějších skončí procházení pod začátkem rozmezí.
+# Vrací články a souhrn (počet položek a shod, čas převodu HTML a tagování)
+def select_articles(entries, start_date, end_date, keywords, seen_ids=None):
     articles = []
-    feed = feedparser.parse(feed_url)
-    for entry in feed.entries:
+    entry_count = 0
+    html_seconds = 0.0
+    keyword_seconds = 0.0
+    matches = 0
+    seen_ids = [] if seen_ids is None else seen_ids
+    seen = set(seen_ids)
+    version = get_matcher(keywords).version
+    previous_date = None
+    ordered = True
+    ordered_entries = 0
+    for entry in entries:
+        entry_count += 1
         if not hasattr(entry, 'published'):
             continue  # Přeskočit články bez atributu 'published'
-        article_date = dateparse(entry.published).replace(tzinfo=pytz.UTC)
+        article_date = parse_entry_date(entry)
+
+        # Kanál seřazený od nejnovějších, který už je pod začátkem rozmezí, nemá smysl procházet dál
+        if previous_date is not None and article_date > previous_date:
+            ordered = False  # Kanál není seřazený, předčasně nekončíme
+        previous_date = article_date
+        ordered_entries += 1
+        if ordered and ordered_entries >= MIN_ORDERED_ENTRIES and article_date < start_date:
+            break
+
+        entry_id = entry.get('id', entry.get('link'))
+        if entry_id in seen:
+            continue  # Položka už byla zpracována při některém z předchozích běhů
         if start_date <= article_date <= end_date:
+            step_start = time.perf_counter()
             summary_text = get_summary_text(entry)
             content = entry.title + " " + summary_text
             link = entry.link
             source = get_server_name(link)
-            keywords_found = contains_keywords(content, keywords)  # Přidáno pro kontrolu klíčových slov
-            if source == 'cedmohub.eu':  # Pokud je zdroj cedmohub.eu, nastavit klíčové slovo na fact-checking
-                keywords_found.append('fact-checking')
+            html_seconds += time.perf_counter() - step_start
+            step_start = time.perf_counter()
+            keywords_found = classify_article(content, source, keywords)
+            keyword_seconds += time.perf_counter() - step_start
+            if keywords_found != ['N/A']:
+                matches += 1
             articles.append({
                 'title': entry.title,
                 'link': link,
                 'published': entry.published,
+                'published_ts': article_date.timestamp(),  # Normalizovaný UTC timestamp, datum se dál už neparsuje
                 'content': content,
                 'source': source,  # Přidání serveru do slovníku
-                'keywords': keywords_found if keywords_found else ['N/A']  # Přidáno klíčové slovo do slovníku
+                'keywords': keywords_found,
+                'keywords_version': version  # Verze slovníku kvůli pozdějšímu přetagování
             })
+            seen_ids.append(entry_id)
+            seen.add(entry_id)
+    return articles, {'entries': entry_count, 'matches': matches, 'html_seconds': html_seconds,
+                      'keyword_seconds': keyword_seconds}
+
+# Načtení a filtrování článků z RSS kanálů; se stream=True se kanál parsuje proudově a stahování
+# skončí, jakmile položky seřazeného kanálu klesnou pod začátek rozmezí.
+# Validátory (ETag / Last-Modified) platí jen pro rozmezí, které se u dané verze kanálu celé prošlo -
+# pro jiné rozmezí se kanál stahuje bez podmínky. Ukládají se až po úspěšném zpracování všech položek
+def fetch_rss(feed_url, start_date, end_date, keywords, cache=None, metrics=None, stream=False):
+    articles = []
+    metrics = metrics or RunMetrics()
+    feed_cache = cache.setdefault(feed_url, {}) if cache is not None else {}
+    feed_start = time.perf_counter()
+    stream = stream and feed_cache.get('stream', True)
+    window = [start_date.timestamp(), end_date.timestamp()]
+    scanned = feed_cache.get('window')
+    if scanned and scanned[0] <= window[0] and window[1] <= scanned[1]:
+        etag, modified = feed_cache.get('etag'), feed_cache.get('modified')
+    else:
+        etag = modified = None
+
+    with metrics.stage('download'):
+        if stream:
+            status, response, headers = with_retries(open_feed, feed_url, etag, modified)
+            transferred = 0  # Přenesené bajty se přičítají průběžně při čtení
+        else:
+            status, body, headers, transferred = with_retries(download_feed, feed_url, etag, modified)
+    feed_cache['status'] = status
+    metrics.record_feed(feed_url, status=status, bytes=transferred, download_seconds=round(time.perf_counter() - feed_start, 6))
+    if status == 304:
+        metrics.record_feed(feed_url, seconds=round(time.perf_counter() - feed_start, 6), entries=0, matches=0)
+        return articles
+
+    if stream:
+        entries = stream_entries(feed_url, response, feed_cache, metrics)
+    else:
+        with metrics.stage('parse'):
+            entries = parse_feed(feed_url, body, headers).entries
+
+    loop_start = time.perf_counter()
+    seen_ids = list(feed_cache.get('seen_ids', []))  # Do cache se zapíše až po zpracování všech položek
+    articles, stats = select_articles(entries, start_date, end_date, keywords, seen_ids)
+    if stream:
+        entries.close()  # Při předčasném ukončení se zavře i spojení a zbytek kanálu se nestahuje
+        # Čas proudového parsování zahrnuje i čekání na data ze sítě
+        metrics.add_time('parse', time.perf_counter() - loop_start - stats['html_seconds'] - stats['keyword_seconds'])
+    feed_cache['seen_ids'] = seen_ids[-MAX_SEEN_IDS:]
+    # Nová verze kanálu je prošlá pro celé rozmezí - teprve teď platí její validátory
+    feed_cache['window'] = window
+    for key, header in (('etag', 'ETag'), ('modified', 'Last-Modified')):
+        if headers.get(header):
+            feed_cache[key] = headers[header]
+        else:
+            feed_cache.pop(key, None)
+    metrics.add_time('html_to_text', stats['html_seconds'])
+    metrics.add_time('keywords', stats['keyword_seconds'])
+    metrics.record_feed(feed_url, seconds=round(time.perf_counter() - feed_start, 6),
+                        entries=stats['entries'], articles=len(articles), matches=stats['matches'])
     return articles
 
 
-# Uložení obsahu RSS kanálů do souboru
-def save_rss_content_to_file(rss_content, file_name):
-    with open(file_name, 'w', encoding='utf-8') as f:
-        json.dump(rss_content, f, ensure_ascii=False, indent=4)
+# Souběžné zpracování kanálů funkcí fetch(feed_url) s omezením současných požadavků na jeden server; výsledky
+# jsou ve stejném pořadí jako seznam feeds. Kanály, které podle health opakovaně selhávají, se až do konce
+# vychladnutí přeskakují a chyba jednoho kanálu nesmí shodit celý běh - výsledkem je v obou případech []
+def map_feeds(fetch, feeds, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, metrics=None, health=None):
+    host_limits = {get_server_name(url): threading.Semaphore(max_per_host) for url in feeds}
+    health = health or FeedHealth()
+
+    def fetch_limited(feed_url):
+        if not health.allow(feed_url):
+            print(f"Přeskočen nefunkční kanál {feed_url}")
+            if metrics:
+                metrics.record_feed(feed_url, status='skip')
+            return []
+        with host_limits[get_server_name(feed_url)]:
+            start = time.perf_counter()
+            try:
+                result = fetch(feed_url)
+            except Exception as e:
+                print(f"Chyba při stahování {feed_url}: {e}")
+                if metrics:
+                    metrics.record_feed(feed_url, error=str(e))
+                if health.record_failure(feed_url, e):
+                    print(f"Kanál {feed_url} selhal opakovaně, dočasně se přeskakuje")
+                return []
+            health.record_success(feed_url, time.perf_counter() - start)
+            return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(feeds)))) as executor:
+        return list(executor.map(fetch_limited, feeds))
+
+
+# Souběžné stažení všech kanálů; články jsou ve stejném pořadí jako seznam feeds
+def fetch_all_feeds(feeds, start_date, end_date, keywords, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, cache=None, metrics=None,
+                    stream=False, health=None):
+    results = map_feeds(lambda feed_url: fetch_rss(feed_url, start_date, end_date, keywords, cache, metrics, stream),
+                        feeds, max_workers, max_per_host, metrics, health)
+    articles = []
+    for feed_articles in results:
+        articles.extend(feed_articles)
+    return articles
+
 
-# Načtení obsahu RSS kanálů ze souboru
+# Rozdělení rozmezí na úseky - po chunk_days dnech, nebo rovnoměrně na zadaný počet úseků (po celých dnech)
+def split_date_range(start_date, end_date, chunks=1, chunk_days=None):
+    days = (end_date.date() - start_date.date()).days + 1
+    chunk_days = chunk_days or -(-days // max(1, chunks))
+    ranges = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(end_date, chunk_start.replace(hour=0, minute=0, second=0, microsecond=0) +
+                        timedelta(days=chunk_days, microseconds=-1))
+        ranges.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(microseconds=1)
+    return ranges
+
+# Stažení a zpracování celého kanálu bez podmíněné cache - backfill potřebuje všechny jeho položky
+def download_entries(feed_url):
+    status, body, headers, transferred = with_retries(download_feed, feed_url)
+    return parse_feed(feed_url, body, headers).entries
+
+# Výběr a otagování položek jednoho úseku backfillu v samostatném procesu
+def backfill_chunk(feed_entries, start_date, end_date):
+    articles = []
+    for entries in feed_entries:
+        articles.extend(select_articles(entries, start_date, end_date, keywords)[0])
+    return articles
+
+# Zpracování delšího rozmezí po úsecích v paralelních procesech. Každý kanál se stáhne jen jednou, se stejnými
+# limity na server a kontrolou zdraví jako běžný běh (kanály stejně nabízejí jen poslední položky); úseky
+# si rozdělí jen výběr položek podle data a tagování. Výsledky se slučují do úložiště ve stejném pořadí
+# jako úseky, duplicity odstraní úložiště
+def backfill(feeds, store, start_date, end_date, workers=None, chunk_days=None, metrics=None):
+    workers = workers or os.cpu_count()
+    ranges = split_date_range(start_date, end_date, workers, chunk_days)
+    cache_file = get_cache_file_name(store.file_name)
+    cache = load_feed_cache(cache_file)
+    feed_entries = map_feeds(download_entries, feeds, metrics=metrics, health=FeedHealth(cache.setdefault('_health', {})))
+    save_feed_cache(cache, cache_file)
+    total = 0
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        futures = [executor.submit(backfill_chunk, feed_entries, chunk_start, chunk_end) for chunk_start, chunk_end in ranges]
+        for (chunk_start, chunk_end), future in zip(ranges, futures):
+            new_articles = store.add_articles(future.result())
+            total += len(new_articles)
+            print(f"Úsek {chunk_start:%Y-%m-%d} až {chunk_end:%Y-%m-%d}: {len(new_articles)} nových článků")
+    return total
+
+# Načtení seznamu kanálů ze souboru - jeden kanál na řádek, prázdné řádky a komentáře (#) se přeskočí
+def load_feeds(file_name):
+    with open(file_name, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+# Načtení obsahu RSS kanálů ze souboru (dřívější formát archivu, používá se pro import do úložiště)
 def load_rss_content_from_file(file_name):
     rss_content = []
     if os.path.exists(file_name):
@@ -75,98 +341,213 @@ def load_rss_content_from_file(file_name):
             rss_content = json.load(f)
     return rss_content
 
-# Aktualizace obsahu RSS kanálů ve souboru na základě nových dat
-def update_rss_content_file(feeds, file_name, start_date, end_date):
-    # Načtení existujícího obsahu
-    rss_content = load_rss_content_from_file(file_name)
-   
-    # Získání nových článků
-    new_articles = []
-    for feed_url in feeds:
-        new_articles.extend(fetch_rss(feed_url, start_date, end_date, keywords))
+# Otevření úložiště článků; při prvním spuštění se do něj naimportuje dřívější JSON archiv
+def open_article_store(file_name, legacy_file_name=None):
+    store = ArticleStore(file_name)
+    if legacy_file_name and not len(store):
+        imported = store.add_articles(load_rss_content_from_file(legacy_file_name))
+        if imported:
+            print(f"Importováno {len(imported)} článků z {legacy_file_name}")
+    return store
+
+# Název souboru s HTTP validátory (ETag / Last-Modified) a ID již zpracovaných položek
+def get_cache_file_name(file_name):
+    return os.path.join(os.path.dirname(file_name), 'rss-cache.json')
 
+# Načtení cache kanálů ze souboru
+def load_feed_cache(file_name):
+    if os.path.exists(file_name):
+        try:
+            with open(file_name, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"Chyba při načítání cache kanálů: {e}")
+    return {}
+
+# Uložení cache kanálů do souboru
+def save_feed_cache(cache, file_name):
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
 
-    # Přidání nových článků k existujícím, pokud ještě nejsou přítomny
-    existing_links = {article['link'] for article in rss_content}
-    for article in new_articles:
-        if article['link'] not in existing_links:
-            rss_content.append(article)
-            existing_links.add(article['link'])
+# Aktualizace úložiště článků na základě nových dat; vrací nově uložené články
+def update_rss_content_file(feeds, store, start_date, end_date, metrics=None, stream=False):
+    metrics = metrics or RunMetrics()
+    cache_file = get_cache_file_name(store.file_name)
+    cache = load_feed_cache(cache_file)
 
-    # Uložení aktualizovaného obsahu zpět do souboru
-    save_rss_content_to_file(rss_content, file_name)
+    # Získání nových článků (kanály se stahují souběžně)
+    http_before = http_client.snapshot()
+    with metrics.stage('fetch_all'):
+        new_articles = fetch_all_feeds(feeds, start_date, end_date, keywords, cache=cache, metrics=metrics, stream=stream,
+                                       health=FeedHealth(cache.setdefault('_health', {})))
+    metrics.add_counters({f'http_{name}': value - http_before[name] for name, value in http_client.snapshot().items()})
+    save_feed_cache(cache, cache_file)
+    unchanged = sum(1 for feed_url in feeds if cache.get(feed_url, {}).get('status') == 304)
+    print(f"Nezměněné kanály: {unchanged}/{len(feeds)}")
 
-    return rss_content
+    # Vložení nových článků, pokud ještě nejsou uloženy (unikátní index na odkazu)
+    with metrics.stage('store'):
+        return store.add_articles(new_articles)
+
+# Patří článek do monitoringu? (má klíčová slova nebo je ze zdroje cedmohub.eu)
+def is_monitored(article):
+    return 'keywords' in article and ('N/A' not in article['keywords'] or article.get('source') == 'cedmohub.eu')
+
+# Ze skupiny téměř shodných zpráv se vypíše jen první článek, který patří do monitoringu - kopie s klíčovými
+# slovy se tak neztratí, ani když první zpráva skupiny žádná nemá. Skupina, která už měla takový článek
+# mezi články uloženými nejpozději s listed_until (a publikovanými v rozmezí), se přeskočí
+def first_monitored_in_groups(store, articles, listed_until=0, start_date=None, end_date=None):
+    monitored = [article for article in articles if is_monitored(article)]
+    listed = set()
+    if listed_until and monitored:
+        start_ts = start_date.timestamp() if start_date else float('-inf')
+        end_ts = end_date.timestamp() if end_date else float('inf')
+        listed = {member['duplicate_of'] or member['id']
+                  for member in store.group_members({article['duplicate_of'] or article['id'] for article in monitored},
+                                                    listed_until)
+                  if is_monitored(member) and start_ts <= member['published_ts'] <= end_ts}
+    result = []
+    for article in monitored:
+        group = article['duplicate_of'] or article['id']
+        if group not in listed:
+            listed.add(group)
+            result.append(article)
+    return result
+
+# Filtrování článků podle klíčových slov a zdroje; datumové rozmezí řeší dotaz nad indexem
+# Při úplném výpisu (after_id=0) se přidají i články z archivních segmentů, které rozmezí překrývá
+def filter_monitored_articles(store, start_date, end_date, after_id=0):
+    articles = first_monitored_in_groups(store, store.query(start_date, end_date, duplicates=True, after_id=after_id),
+                                         after_id, start_date, end_date)
+    if not after_id:
+        archive_dir = os.path.join(os.path.dirname(store.file_name), ARCHIVE_DIR)
+        articles = first_monitored_archived(iter_archived(start_date, end_date, archive_dir)) + articles
+    return articles
+
+# Stejný výběr pro archivované články - skupinu nese pole 'group'; ze starších segmentů bez něj
+# se berou jen první zprávy skupin
+def first_monitored_archived(articles):
+    listed = set()
+    result = []
+    for article in articles:
+        if not is_monitored(article):
+            continue
+        group = article.get('group')
+        if group is None:
+            if article['duplicate']:
+                continue
+        elif group in listed:
+            continue
+        else:
+            listed.add(group)
+        result.append(article)
+    return result
+
+# Průběžné sledování kanálů - každý kanál se stahuje podle vlastního, průběžně upravovaného intervalu.
+# Rozmezí končí pevně v daleké budoucnosti a jeho začátek se jen posouvá dopředu, takže ho rozmezí
+# předchozího stažení vždy pokrývá a nezměněný kanál vrátí 304
+def watch_rss(feeds, store, lookback=timedelta(days=1), stream=False):
+    cache_file = get_cache_file_name(store.file_name)
+    cache = load_feed_cache(cache_file)
+    scheduler = FeedScheduler(feeds, cache.setdefault('_schedule', {}))
+    health = FeedHealth(cache.setdefault('_health', {}))
+
+    # Každé vlákno pracuje s vlastní kopií cache kanálu, do sdílené cache se zapisuje až v hlavním vlákně
+    def fetch_feed(feed_url):
+        now = datetime.now(pytz.UTC)
+        feed_cache = {feed_url: dict(cache.get(feed_url, {}))}
+        start = time.perf_counter()
+        try:
+            articles = fetch_rss(feed_url, now - lookback, WATCH_END, keywords, feed_cache, stream=stream)
+        except Exception as e:
+            health.record_failure(feed_url, e)
+            raise
+        health.record_success(feed_url, time.perf_counter() - start)
+        return feed_cache[feed_url], articles
+
+    def handle_results(feed_url, result):
+        cache[feed_url], articles = result
+        new_articles = store.add_articles(articles)
+        if new_articles:
+            display_articles_to_console(first_monitored_in_groups(store, new_articles, new_articles[0]['id'] - 1))
+        return len(new_articles)
+
+    # Zdraví kanálů zapisují i běžící vlákna - cache se ukládá pod jeho zámkem, aby se neměnila během serializace
+    def save_state():
+        with health.lock:
+            save_feed_cache(cache, cache_file)
+
+    print(f"Sledování {len(feeds)} kanálů, ukončení pomocí Ctrl+C")
+    try:
+        watch_feeds(scheduler, fetch_feed, handle_results, save_state)
+    except KeyboardInterrupt:
+        save_state()
+
+# Formátování data publikace z normalizovaného timestampu
+def format_published(article, fmt):
+    return datetime.fromtimestamp(article['published_ts'], pytz.UTC).strftime(fmt)
 
 # Uložení filtrovaných článků do souboru monitoring.md
-def save_articles_to_file(articles, output_file):
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for article in articles:
-            source = article.get('source', 'unknown')  # Zajištění, že klíč 'source' vždy existuje
-            keywords = ', '.join(article.get('keywords', ['N/A']))  # Zajištění, že klíč 'keywords' vždy existuje
-            published_date = dateparse(article['published']).strftime("%d.%m")
-            line = f'<li class="novinka" data-keywords="{keywords}"><a href="{article["link"]}" target="_blank">{article["title"]}</a> <small>({source})</small> <code class="highlighter-rouge">{keywords}</code></li>\n'
-            f.write(line)
+def save_articles_to_file(articles, output_file, fmt='html'):
+    write_articles(articles, output_file, fmt)
+
+# Průběžná aktualizace výstupu - pro stejné rozmezí a formát se na konec doplní jen nové články,
+# jinak (nebo s rebuild=True) se výstup vytvoří znovu; vrací zapsané články
+def update_monitoring_output(store, start_date, end_date, output_file, fmt='html', rebuild=False):
+    state_file = output_file + '.state.json'
+    state = load_render_state(state_file)
+    window = [start_date.isoformat(), end_date.isoformat()]
+    append = (not rebuild and os.path.exists(output_file) and
+              state.get('window') == window and state.get('format') == fmt)
+    last_id = store.max_id()
+    articles = filter_monitored_articles(store, start_date, end_date, state.get('last_id', 0) if append else 0)
+    write_articles(articles, output_file, fmt, append)
+    save_render_state({'window': window, 'format': fmt, 'last_id': last_id}, state_file)
+    return articles
 
 # Zobrazení filtrovaných článků na obrazovku
 def display_articles_to_console(articles):
     for article in articles:
         source = article.get('source', 'unknown')  # Zajištění, že klíč 'source' vždy existuje
         keywords = ', '.join(article.get('keywords', ['N/A']))  # Zajištění, že klíč 'keywords' vždy existuje
-        published_date = dateparse(article['published']).strftime("%d.%m")
+        published_date = format_published(article, "%d.%m")
         line = f"- {article['title']} ({source}, {published_date} - {keywords})"
         print(line)
 
 # Hlavní program
 if __name__ == "__main__":
-    # Seznam RSS kanálů
-    feeds = [
-        'https://hlidacipes.org/feed/',
-        'https://www.irozhlas.cz/rss/irozhlas/tag/7708693',
-        'https://denikn.cz/minuta/feed/',
-        'https://dennikn.sk/minuta/feed',
-        'https://dennikn.sk/rss/',
-        'https://denikn.cz/rss/',
-        'https://www.mvcr.cz/chh/SCRIPT/rss.aspx?nid=',
-        'https://cedmohub.eu/cs/feed/',
-        'https://europeanvalues.cz/cs/feed/',
-        #'https://demagog.cz/rss/index.atom', - Zatím vypnu, cedmohub postuje jak AFP, tak Demagog, tak aby nebylo 2x
-        'https://www.voxpot.cz/feed/',
-        'https://www.aktuality.sk/rss/',
-        'https://zpravy.aktualne.cz/rss/',
-        'https://www.seznamzpravy.cz/rss',
-        'https://www.irozhlas.cz/rss/irozhlas/section/zpravy-domov',
-        'https://www.irozhlas.cz/rss/irozhlas/section/zpravy-svet',
-        'https://www.lupa.cz/rss/clanky/',
-        'https://www.denik.cz/rss/zpravy.html',
-        'https://www.novinky.cz/rss',
-        'https://euractiv.cz/feed/',
-        'https://euractiv.sk/feed/',
-        'https://cc.cz/feed/',
-        'https://www.ceskenoviny.cz/sluzby/rss/cr.php',
-        'https://www.ceskenoviny.cz/sluzby/rss/svet.php',
-        'https://www.zive.cz/rss/sc-47/',
-        'https://servis.idnes.cz/rss.aspx?c=zpravodaj',
-        'https://ct24.ceskatelevize.cz/rss/tema/hlavni-zpravy-84313',
-        'https://domaci.hn.cz/?m=rss',
-        'https://zahranicni.hn.cz/?m=rss',
-        'https://www.investigace.cz/feed/',
-        'https://www.sme.sk/rss-title',
-        'https://spravy.rtvs.sk/feed/',
-        'https://www.respekt.cz/api/rss?type=articles&unlocked=1',    
-        'https://refresher.cz/rss',
-        'https://refresher.sk/rss',
-        'https://www.tyzden.sk/feed/',
-        'https://hnonline.sk/feed',
-        'http://www.teraz.sk/rss/slovensko.rss',
-        'http://www.teraz.sk/rss/zahranicie.rss',
-        'https://www.topky.sk/rss/8/topky'
-        # Přidejte další RSS kanály podle potřeby
-    ]
-
-    # Zadání datumového rozmezí
-    start_date_str = input("Zadejte počáteční datum (YYYY-MM-DD): ")
-    end_date_str = input("Zadejte koncové datum (YYYY-MM-DD): ")
+    # Parametry příkazové řádky
+    parser = argparse.ArgumentParser(description="Monitoring RSS kanálů podle klíčových slov")
+    parser.add_argument('--from', dest='start', help="počáteční datum YYYY-MM-DD (výchozí dnes)")
+    parser.add_argument('--to', dest='end', help="koncové datum YYYY-MM-DD (výchozí dnes)")
+    parser.add_argument('--feeds-file', help="soubor se seznamem kanálů, jeden na řádek (výchozí feeds.py)")
+    parser.add_argument('--output', help="výstupní soubor (výchozí monitoring.md, resp. monitoring.<formát>)")
+    parser.add_argument('--db', default='rss-obsah.db', help="databáze článků (výchozí rss-obsah.db)")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='html', help="formát výstupu (výchozí html)")
+    parser.add_argument('--rebuild', action='store_true', help="vytvořit výstup znovu celý místo doplnění nových článků")
+    parser.add_argument('--watch', action='store_true', help="průběžně sledovat kanály s intervalem přizpůsobeným každému kanálu")
+    parser.add_argument('--stream', action='store_true', help="parsovat kanály proudově (nízká paměť, dřívější ukončení)")
+    parser.add_argument('--backfill', action='store_true', help="zpracovat rozmezí po úsecích v paralelních procesech")
+    parser.add_argument('--chunk-days', type=int, help="délka úseku pro --backfill ve dnech (výchozí rozdělení mezi procesy)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="počet procesů pro --backfill")
+    parser.add_argument('--metrics', default='metrics.json', help="soubor se souhrnem měření (JSON)")
+    parser.add_argument('--table', action='store_true', help="vypsat tabulku s časy kroků a kanálů")
+    parser.add_argument('--profile', help="uložit profil z cProfile do zadaného souboru")
+    args = parser.parse_args()
+
+    feeds = load_feeds(args.feeds_file) if args.feeds_file else default_feeds
+
+    if args.watch:
+        store = open_article_store(args.db, "rss-obsah.json")
+        watch_rss(feeds, store, stream=args.stream)
+        store.close()
+        raise SystemExit
+
+    # Zadání datumového rozmezí - interaktivně jen při spuštění z terminálu bez --from/--to
+    start_date_str, end_date_str = args.start, args.end
+    if start_date_str is None and end_date_str is None and not args.backfill and sys.stdin.isatty():
+        start_date_str = input("Zadejte počáteční datum (YYYY-MM-DD): ")
+        end_date_str = input("Zadejte koncové datum (YYYY-MM-DD): ")
 
     # Použití aktuálního data, pokud nejsou zadány
     if not start_date_str:
@@ -179,21 +560,27 @@ if __name__ == "__main__":
     else:
         end_date = datetime.strptime(end_date_str, "%Y-%m-%d").replace(tzinfo=pytz.UTC) + timedelta(days=1, seconds=-1)
 
-    # Název souboru s kompletním obsahem RSS kanálů
-    rss_content_file = "rss-obsah.json"
+    metrics = RunMetrics()
+    with profile_to(args.profile):
+        # Úložiště s kompletním obsahem RSS kanálů (a dřívější JSON archiv pro jednorázový import)
+        store = open_article_store(args.db, "rss-obsah.json")
+
+        # Aktualizace obsahu RSS kanálů v úložišti
+        if args.backfill:
+            with metrics.stage('backfill'):
+                backfill(feeds, store, start_date, end_date, args.workers, args.chunk_days, metrics)
+        else:
+            update_rss_content_file(feeds, store, start_date, end_date, metrics, args.stream)
 
-    # Aktualizace obsahu RSS kanálů ve souboru
-    updated_rss_content = update_rss_content_file(feeds, rss_content_file, start_date, end_date)
+        # Filtrování článků podle klíčových slov, datumového rozmezí a zdroje a doplnění nových do výstupu
+        output_file = args.output or ('monitoring.md' if args.format == 'html' else f'monitoring.{args.format}')
+        with metrics.stage('output'):
+            filtered_articles = update_monitoring_output(store, start_date, end_date, output_file, args.format, args.rebuild)
+        store.close()
 
-    # Filtrování článků podle klíčových slov a datumového rozmezí a zdroje
-    filtered_articles = [
-        article for article in updated_rss_content
-        if ('keywords' in article and ('N/A' not in article['keywords'] or article.get('source') == 'cedmohub.eu') and
-        start_date <= dateparse(article['published']).replace(tzinfo=pytz.UTC) <= end_date)
-    ]
-   
-    # Uložení filtrovaných článků do souboru
-    save_articles_to_file(filtered_articles, 'monitoring.md')
+        # Zobrazení nově zapsaných článků na obrazovku
+        display_articles_to_console(filtered_articles)
 
-    # Zobrazení filtrovaných článků na obrazovku
-    display_articles_to_console(filtered_articles)
+    metrics.save(args.metrics)
+    if args.table:
+        metrics.print_table()
@@ -0,0 +1,96 @@
+import contextlib
+import cProfile
+import json
+import threading
+import time
+from datetime import datetime
+import pytz
+
+
+# Měření běhu - časy jednotlivých kroků a statistiky po kanálech (bezpečné pro více vláken)
+class RunMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(pytz.UTC)
+        self.stages = {}
+        self.feeds = {}
+        self.counters = {}
+
+    # Přičtení času ke kroku; u kroků běžících ve více vláknech jde o součet časů všech vláken
+    def add_time(self, stage, seconds):
+        with self.lock:
+            total = self.stages.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+            total['seconds'] += seconds
+            total['calls'] += 1
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    # Přičtení počítadel (např. požadavky, spojení a bajty HTTP klienta)
+    def add_counters(self, values):
+        with self.lock:
+            for name, value in values.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    # Záznam hodnot pro jeden kanál; číselné hodnoty se sčítají, ostatní přepisují
+    def record_feed(self, feed_url, **values):
+        with self.lock:
+            record = self.feeds.setdefault(feed_url, {})
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and key in record:
+                    record[key] += value
+                else:
+                    record[key] = value
+
+    def summary(self):
+        with self.lock:
+            return {
+                'started': self.started_at.isoformat(),
+                'total_seconds': round(time.perf_counter() - self.started, 6),
+                'stages': {name: {'seconds': round(value['seconds'], 6), 'calls': value['calls']}
+                           for name, value in self.stages.items()},
+                'counters': dict(self.counters),
+                'feeds': {url: dict(record) for url, record in self.feeds.items()},
+            }
+
+    def save(self, file_name):
+        with open(file_name, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=4)
+
+    # Výpis tabulky do konzole - kroky a nejpomalejší kanály
+    def print_table(self, slowest=10):
+        summary = self.summary()
+        print(f"\nCelkový čas běhu: {summary['total_seconds']:.3f} s")
+        print(f"{'Krok':<16} {'čas [s]':>10} {'volání':>8}")
+        for name, value in sorted(summary['stages'].items(), key=lambda item: -item[1]['seconds']):
+            print(f"{name:<16} {value['seconds']:>10.3f} {value['calls']:>8}")
+        if summary['counters']:
+            print(', '.join(f"{name}: {value}" for name, value in summary['counters'].items()))
+        feeds = sorted(summary['feeds'].items(), key=lambda item: -item[1].get('seconds', 0))[:slowest]
+        if feeds:
+            print(f"\n{'Kanál':<60} {'čas [s]':>8} {'stav':>5} {'bajty':>10} {'položky':>8} {'shody':>6}")
+            for url, record in feeds:
+                print(f"{url[:60]:<60} {record.get('seconds', 0):>8.3f} {str(record.get('status', '-')):>5} "
+                      f"{record.get('bytes', 0):>10} {record.get('entries', 0):>8} {record.get('matches', 0):>6}")
+
+
+# Volitelné profilování pomocí cProfile; výsledek lze prohlížet např. přes python -m pstats
+@contextlib.contextmanager
+def profile_to(file_name):
+    if not file_name:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(file_name)
+        print(f"Profil uložen do {file_name}")
@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+from datetime import datetime
+from html import escape
+import pytz
+
+
+# Výstup jako HTML fragment s položkami <li> (formát monitoring.md)
+class HtmlWriter:
+    def __init__(self, file_name, append):
+        self.f = open(file_name, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, article):
+        source = escape(article.get('source', 'unknown'))  # Zajištění, že klíč 'source' vždy existuje
+        keywords = escape(', '.join(article.get('keywords', ['N/A'])))  # Zajištění, že klíč 'keywords' vždy existuje
+        self.f.write(f'<li class="novinka" data-keywords="{keywords}"><a href="{escape(article["link"])}" target="_blank">'
+                     f'{escape(article["title"])}</a> <small>({source})</small> '
+                     f'<code class="highlighter-rouge">{keywords}</code></li>\n')
+
+    def close(self):
+        self.f.close()
+
+
+# Výstup ve formátu JSON Feed 1.1; při doplňování se přepíše jen konec souboru
+class JsonFeedWriter:
+    HEADER = '{"version": "https://jsonfeed.org/version/1.1", "title": "Monitoring", "items": ['
+    TRAILER = '\n]}\n'
+
+    def __init__(self, file_name, append):
+        self.first = True
+        if append:
+            self.f = open(file_name, 'r+', encoding='utf-8')
+            self.f.seek(0, os.SEEK_END)
+            end = self.f.tell() - len(self.TRAILER)
+            self.f.seek(end - 1)
+            self.first = self.f.read(1) == '['
+            self.f.seek(end)
+            self.f.truncate()
+        else:
+            self.f = open(file_name, 'w', encoding='utf-8')
+            self.f.write(self.HEADER)
+
+    def write(self, article):
+        item = {
+            'id': article['link'],
+            'url': article['link'],
+            'title': article['title'],
+            'content_text': article.get('content', ''),
+            'date_published': datetime.fromtimestamp(article['published_ts'], pytz.UTC).isoformat(),
+            'tags': article.get('keywords', ['N/A']),
+            '_source': article.get('source', 'unknown'),
+        }
+        self.f.write(('\n' if self.first else ',\n') + json.dumps(item, ensure_ascii=False))
+        self.first = False
+
+    def close(self):
+        self.f.write(self.TRAILER)
+        self.f.close()
+
+
+# Výstup jako CSV s hlavičkou
+class CsvWriter:
+    FIELDS = ['published', 'source', 'title', 'link', 'keywords']
+
+    def __init__(self, file_name, append):
+        self.f = open(file_name, 'a' if append else 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.f)
+        if not append:
+            self.writer.writerow(self.FIELDS)
+
+    def write(self, article):
+        published = datetime.fromtimestamp(article['published_ts'], pytz.UTC).isoformat()
+        self.writer.writerow([published, article.get('source', 'unknown'), article['title'], article['link'],
+                              ', '.join(article.get('keywords', ['N/A']))])
+
+    def close(self):
+        self.f.close()
+
+
+# Dostupné výstupní formáty - další formát stačí přidat sem
+FORMATS = {
+    'html': HtmlWriter,
+    'json': JsonFeedWriter,
+    'csv': CsvWriter,
+}
+
+
+# Zápis článků v jednom průchodu; append=True doplní články na konec existujícího výstupu
+def write_articles(articles, file_name, fmt='html', append=False):
+    writer = FORMATS[fmt](file_name, append)
+    try:
+        for article in articles:
+            writer.write(article)
+    finally:
+        writer.close()
+
+
+# Stav výstupu - pro jaké rozmezí a formát byl vytvořen a do kterého článku (id v úložišti) je aktuální
+def load_render_state(file_name):
+    if os.path.exists(file_name):
+        try:
+            with open(file_name, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def save_render_state(state, file_name):
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
@@ -0,0 +1,54 @@
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from keywords import keywords
+from mediacheck import classify_article, get_matcher, open_article_store
+
+# Velikost dávky článků posílané jednomu procesu
+CHUNK_SIZE = 500
+
+# Přetagování dávky článků v pracovním procesu; změněné články vrací i s novými klíčovými slovy
+def retag_chunk(rows):
+    changed = []
+    unchanged_ids = []
+    for article_id, content, source, old_keywords in rows:
+        found = classify_article(content or '', source, keywords)
+        if found != old_keywords:
+            changed.append((article_id, found))
+        else:
+            unchanged_ids.append(article_id)
+    return changed, unchanged_ids
+
+# Přetagování článků otagovaných starší verzí keywords.py
+def retag_store(store, workers=None):
+    version = get_matcher(keywords).version
+    total_changed = 0
+    total_checked = 0
+    workers = workers or os.cpu_count()
+    pending = deque()
+
+    def write_result(future):
+        nonlocal total_changed, total_checked
+        changed, unchanged_ids = future.result()
+        store.update_keywords(changed, unchanged_ids, version)
+        total_changed += len(changed)
+        total_checked += len(changed) + len(unchanged_ids)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Dávky se čtou postupně a v paměti jich je jen omezený počet; zapisují se ve stejném pořadí
+        for rows in store.iter_stale(version, CHUNK_SIZE):
+            pending.append(executor.submit(retag_chunk, rows))
+            if len(pending) >= 2 * workers:
+                write_result(pending.popleft())
+        while pending:
+            write_result(pending.popleft())
+    print(f"Verze slovníku {version}: zkontrolováno {total_checked} článků, změněno {total_changed}")
+    return total_changed
+
+# Spuštění: python retag.py [rss-obsah.db]
+if __name__ == "__main__":
+    rss_content_file = sys.argv[1] if len(sys.argv) > 1 else "rss-obsah.db"
+    store = open_article_store(rss_content_file, "rss-obsah.json")
+    retag_store(store)
+    store.close()
@@ -0,0 +1,68 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+import pytz
+from archive import ARCHIVE_DIR, iter_archived
+from dedup import TOKEN_RE, fold_text
+from store import ArticleStore, text_terms
+
+
+# Slova dotazu - malá písmena bez diakritiky, každé se hledá jako prefix (stejně jako kmeny v keywords.py)
+def query_terms(query):
+    return TOKEN_RE.findall(fold_text(query))
+
+
+# Shoda archivovaného článku s dotazem (segmenty archivu nejsou indexované, prochází se postupně)
+def matches_archived(article, terms, source=None, category=None):
+    if source is not None and article.get('source') != source:
+        return False
+    if category is not None and category not in article.get('keywords', []):
+        return False
+    words = text_terms(f"{article.get('title') or ''} {article.get('content') or ''}")
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+def parse_day(value, end=False):
+    day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=pytz.UTC)
+    return day + timedelta(days=1, seconds=-1) if end else day
+
+
+# Spuštění: python search.py "rajchl" [--category dezinformace] [--source novinky.cz] [--from 2024-05-01] [--to 2024-05-31]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vyhledávání v uložených článcích")
+    parser.add_argument('query', nargs='?', default='', help="hledaná slova (prefixy, bez ohledu na diakritiku)")
+    parser.add_argument('--category', help="kategorie z keywords.py")
+    parser.add_argument('--source', help="zdroj (název serveru, např. novinky.cz)")
+    parser.add_argument('--from', dest='start', help="počáteční datum YYYY-MM-DD")
+    parser.add_argument('--to', dest='end', help="koncové datum YYYY-MM-DD")
+    parser.add_argument('--duplicates', action='store_true', help="vypsat i téměř shodné kopie zpráv")
+    parser.add_argument('--limit', type=int, default=50, help="nejvýše tolik článků (0 = bez omezení)")
+    parser.add_argument('--archive', action='store_true', help="prohledat i segmenty archivu (pomalejší)")
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR, help="adresář se segmenty archivu")
+    parser.add_argument('--db', default='rss-obsah.db', help="databáze článků")
+    args = parser.parse_args()
+
+    terms = query_terms(args.query)
+    start_date = parse_day(args.start) if args.start else None
+    end_date = parse_day(args.end, end=True) if args.end else None
+
+    started = time.perf_counter()
+    store = ArticleStore(args.db)
+    articles = store.search(terms, start_date, end_date, args.source, args.category, args.duplicates, args.limit)
+    store.close()
+    if args.archive and (not args.limit or len(articles) < args.limit):
+        archived = (article for article in iter_archived(start_date or datetime(1970, 1, 1, tzinfo=pytz.UTC),
+                                                         end_date or datetime.now(pytz.UTC), args.archive_dir)
+                    if (args.duplicates or not article.get('duplicate'))
+                    and matches_archived(article, terms, args.source, args.category))
+        for article in archived:
+            articles.append(article)
+            if args.limit and len(articles) >= args.limit:
+                break
+    elapsed = time.perf_counter() - started
+
+    for article in articles:
+        published = datetime.fromtimestamp(article['published_ts'], pytz.UTC).strftime('%Y-%m-%d')
+        print(f"{published} {article.get('source', 'unknown')}: {article['title']} "
+              f"({', '.join(article.get('keywords', ['N/A']))})\n    {article['link']}")
+    print(f"Nalezeno článků: {len(articles)} ({elapsed * 1000:.1f} ms)")
@@ -0,0 +1,240 @@
+import json
+import sqlite3
+from dates import published_timestamp
+from dedup import (DUPLICATE_WINDOW, MAX_DISTANCE, TOKEN_RE, canonical_url, fold_text, hamming_distance, simhash,
+                   simhash_bands, to_signed, to_unsigned)
+
+# Sloupce článku v pořadí, v jakém jsou uloženy v tabulce
+ARTICLE_COLUMNS = ['link', 'title', 'published', 'published_ts', 'content', 'source', 'keywords', 'keywords_version',
+                   'canonical_link', 'simhash', 'duplicate_of']
+
+# Sloupce přidané do schématu později - u starších databází se doplní pomocí ALTER TABLE
+ADDED_COLUMNS = {'keywords_version': 'TEXT', 'canonical_link': 'TEXT', 'simhash': 'INTEGER', 'duplicate_of': 'INTEGER'}
+
+# Verze fulltextového indexu (PRAGMA user_version) - při změně tokenizace se index přestaví
+TERMS_VERSION = 1
+
+# Kratší slova se do fulltextového indexu neukládají
+MIN_TERM_LENGTH = 2
+
+
+# Slova textu pro fulltextový index - malá písmena bez diakritiky, každé jen jednou
+def text_terms(text):
+    return {token for token in TOKEN_RE.findall(fold_text(text)) if len(token) >= MIN_TERM_LENGTH}
+
+
+# Rozsah řetězců začínajících daným prefixem (pro vyhledání v indexu podle prefixu)
+def prefix_range(prefix):
+    return prefix, prefix + chr(0x10FFFF)
+
+
+# Úložiště článků v SQLite - unikátní index na odkazu, indexy na datu publikace a zdroji,
+# LSH index otisků obsahu pro seskupení téměř shodných zpráv a fulltextový index slov titulku a obsahu
+class ArticleStore:
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.conn = sqlite3.connect(file_name, timeout=30)  # Do úložiště může zapisovat více procesů současně
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                link TEXT NOT NULL UNIQUE,
+                title TEXT,
+                published TEXT,
+                published_ts REAL,
+                content TEXT,
+                source TEXT,
+                keywords TEXT
+            );
+        """)
+        existing = {row['name'] for row in self.conn.execute('PRAGMA table_info(articles)')}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f'ALTER TABLE articles ADD COLUMN {column} {column_type}')
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_articles_published_ts ON articles (published_ts);
+            CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source);
+            CREATE INDEX IF NOT EXISTS idx_articles_keywords_version ON articles (keywords_version);
+            CREATE INDEX IF NOT EXISTS idx_articles_canonical_link ON articles (canonical_link);
+            CREATE INDEX IF NOT EXISTS idx_articles_duplicate_of ON articles (duplicate_of);
+            CREATE TABLE IF NOT EXISTS article_bands (
+                article_id INTEGER NOT NULL,
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                published_ts REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_article_bands ON article_bands (band, value, published_ts);
+            CREATE TABLE IF NOT EXISTS article_terms (
+                term TEXT NOT NULL,
+                article_id INTEGER NOT NULL,
+                PRIMARY KEY (term, article_id)
+            ) WITHOUT ROWID;
+        """)
+        self._index_missing_fingerprints()
+        self._rebuild_terms_if_outdated()
+
+    def close(self):
+        self.conn.close()
+
+    def max_id(self):
+        return self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM articles').fetchone()[0]
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    @staticmethod
+    def _to_row(article):
+        return tuple(json.dumps(article.get(column, ['N/A']), ensure_ascii=False) if column == 'keywords'
+                     else article.get(column) for column in ARTICLE_COLUMNS)
+
+    @staticmethod
+    def _from_row(row):
+        article = {column: row[column] for column in ARTICLE_COLUMNS}
+        article['id'] = row['id']
+        article['keywords'] = json.loads(row['keywords']) if row['keywords'] else ['N/A']
+        return article
+
+    # Hledání téměř shodného článku přes LSH index - kandidáti sdílejí alespoň jedno pásmo otisku
+    # a byli publikováni v podobnou dobu; vrací id první zprávy skupiny
+    def _find_near_duplicate(self, fingerprint, published_ts):
+        for band, value in simhash_bands(fingerprint):
+            for row in self.conn.execute(
+                    'SELECT a.id, a.simhash, a.duplicate_of FROM article_bands b JOIN articles a ON a.id = b.article_id '
+                    'WHERE b.band = ? AND b.value = ? AND b.published_ts BETWEEN ? AND ?',
+                    (band, value, published_ts - DUPLICATE_WINDOW, published_ts + DUPLICATE_WINDOW)):
+                if hamming_distance(fingerprint, to_unsigned(row['simhash'])) <= MAX_DISTANCE:
+                    return row['duplicate_of'] or row['id']
+        return None
+
+    def _insert_bands(self, article_id, fingerprint, published_ts):
+        self.conn.executemany(
+            'INSERT INTO article_bands (article_id, band, value, published_ts) VALUES (?, ?, ?, ?)',
+            [(article_id, band, value, published_ts) for band, value in simhash_bands(fingerprint)])
+
+    # Doplnění otisků u článků uložených dříve, než úložiště detekovalo duplicity
+    def _index_missing_fingerprints(self):
+        rows = self.conn.execute('SELECT id, link, content, published_ts FROM articles WHERE simhash IS NULL').fetchall()
+        with self.conn:
+            for row in rows:
+                fingerprint = simhash(row['content'] or '')
+                self.conn.execute('UPDATE articles SET canonical_link = ?, simhash = ? WHERE id = ?',
+                                  (canonical_url(row['link']), to_signed(fingerprint), row['id']))
+                if fingerprint:
+                    self._insert_bands(row['id'], fingerprint, row['published_ts'])
+
+    def _insert_terms(self, article_id, article):
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO article_terms (term, article_id) VALUES (?, ?)',
+            [(term, article_id) for term in text_terms(f"{article.get('title') or ''} {article.get('content') or ''}")])
+
+    # Přestavění fulltextového indexu u databází vytvořených před jeho zavedením (nebo se starší tokenizací)
+    def _rebuild_terms_if_outdated(self):
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] >= TERMS_VERSION:
+            return
+        with self.conn:
+            self.conn.execute('DELETE FROM article_terms')
+            for row in self.conn.execute('SELECT id, title, content FROM articles').fetchall():
+                self._insert_terms(row['id'], dict(row))
+            self.conn.execute(f'PRAGMA user_version = {TERMS_VERSION}')
+
+    # Vložení článků, které ještě nejsou uloženy; vrací seznam nově vložených.
+    # Článek se stejnou kanonickou URL se neukládá, téměř shodný článek se uloží s odkazem na první zprávu skupiny
+    def add_articles(self, articles):
+        inserted = []
+        with self.conn:
+            for article in articles:
+                article = dict(article)
+                article['published_ts'] = article.get('published_ts') or published_timestamp(article['published'])
+                article['canonical_link'] = canonical_url(article['link'])
+                if self.conn.execute('SELECT 1 FROM articles WHERE canonical_link = ? OR link = ?',
+                                     (article['canonical_link'], article['link'])).fetchone():
+                    continue
+                fingerprint = simhash(article.get('content') or '')
+                article['simhash'] = to_signed(fingerprint)
+                article['duplicate_of'] = self._find_near_duplicate(fingerprint, article['published_ts']) if fingerprint else None
+                cursor = self.conn.execute(
+                    f'INSERT INTO articles ({", ".join(ARTICLE_COLUMNS)}) '
+                    f'VALUES ({", ".join("?" * len(ARTICLE_COLUMNS))}) ON CONFLICT(link) DO NOTHING',
+                    self._to_row(article))
+                if cursor.rowcount:
+                    article['id'] = cursor.lastrowid
+                    if fingerprint:  # Prázdný text nemá smysl porovnávat
+                        self._insert_bands(cursor.lastrowid, fingerprint, article['published_ts'])
+                    self._insert_terms(cursor.lastrowid, article)
+                    inserted.append(article)
+        return inserted
+
+    # Články publikované v daném rozmezí (využívá index na datu), volitelně jen z jednoho zdroje
+    # Téměř shodné kopie zpráv se vrací jen s duplicates=True
+    # after_id omezí výsledek na články uložené po článku s daným id
+    def query(self, start_date, end_date, source=None, duplicates=False, after_id=0):
+        sql = 'SELECT * FROM articles WHERE published_ts BETWEEN ? AND ? AND id > ?'
+        params = [start_date.timestamp(), end_date.timestamp(), after_id]
+        if not duplicates:
+            sql += ' AND duplicate_of IS NULL'
+        if source is not None:
+            sql += ' AND source = ?'
+            params.append(source)
+        sql += ' ORDER BY id'
+        return [self._from_row(row) for row in self.conn.execute(sql, params)]
+
+    # Články skupin téměř shodných zpráv (první zprávy s danými id a jejich kopie) uložené nejpozději s článkem max_id
+    def group_members(self, group_ids, max_id):
+        group_ids = json.dumps(sorted(group_ids))
+        return [self._from_row(row) for row in self.conn.execute(
+            'SELECT * FROM articles WHERE id IN (SELECT value FROM json_each(?)) AND id <= ? '
+            'UNION SELECT * FROM articles WHERE duplicate_of IN (SELECT value FROM json_each(?)) AND id <= ? ORDER BY id',
+            (group_ids, max_id, group_ids, max_id))]
+
+    # Fulltextové hledání - každé slovo dotazu se hledá jako prefix slova v titulku nebo obsahu (bez ohledu
+    # na diakritiku), článek musí obsahovat všechna slova; filtry podle kategorie, zdroje a rozmezí publikace.
+    # Vrací nejnovější články jako první
+    def search(self, terms, start_date=None, end_date=None, source=None, category=None, duplicates=False, limit=None):
+        sql = 'SELECT * FROM articles WHERE 1'
+        params = []
+        for term in terms:
+            sql += ' AND id IN (SELECT article_id FROM article_terms WHERE term >= ? AND term < ?)'
+            params.extend(prefix_range(term))
+        if start_date is not None:
+            sql += ' AND published_ts >= ?'
+            params.append(start_date.timestamp())
+        if end_date is not None:
+            sql += ' AND published_ts <= ?'
+            params.append(end_date.timestamp())
+        if source is not None:
+            sql += ' AND source = ?'
+            params.append(source)
+        if category is not None:
+            sql += ' AND EXISTS (SELECT 1 FROM json_each(articles.keywords) WHERE value = ?)'
+            params.append(category)
+        if not duplicates:
+            sql += ' AND duplicate_of IS NULL'
+        sql += ' ORDER BY published_ts DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [self._from_row(row) for row in self.conn.execute(sql, params)]
+
+    # Články otagované jinou verzí slovníku klíčových slov, po dávkách (id, obsah, zdroj, klíčová slova)
+    def iter_stale(self, keywords_version, batch_size=1000):
+        last_id = 0
+        while True:
+            rows = self.conn.execute(
+                'SELECT id, content, source, keywords FROM articles '
+                'WHERE id > ? AND (keywords_version IS NULL OR keywords_version != ?) ORDER BY id LIMIT ?',
+                (last_id, keywords_version, batch_size)).fetchall()
+            if not rows:
+                return
+            yield [(row['id'], row['content'], row['source'], json.loads(row['keywords'])) for row in rows]
+            last_id = rows[-1]['id']
+
+    # Zápis nových klíčových slov jen u změněných článků; ostatním se jen označí verze slovníku
+    def update_keywords(self, changed, unchanged_ids, keywords_version):
+        with self.conn:
+            self.conn.executemany(
+                'UPDATE articles SET keywords = ?, keywords_version = ? WHERE id = ?',
+                [(json.dumps(found, ensure_ascii=False), keywords_version, article_id) for article_id, found in changed])
+            self.conn.executemany(
+                'UPDATE articles SET keywords_version = ? WHERE id = ?',
+                [(keywords_version, article_id) for article_id in unchanged_ids])
@@ -0,0 +1,94 @@
+import heapq
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Výchozí, nejkratší a nejdelší interval stahování jednoho kanálu (v sekundách)
+DEFAULT_INTERVAL = 15 * 60
+MIN_INTERVAL = 2 * 60
+MAX_INTERVAL = 6 * 60 * 60
+
+# Kolik nových položek chceme v průměru najít při jednom stažení
+TARGET_ITEMS_PER_POLL = 2
+
+# Váha posledního měření v klouzavém průměru rychlosti publikování
+RATE_SMOOTHING = 0.3
+
+
+# Plánovač stahování - každý kanál má vlastní interval podle toho, jak často publikuje
+class FeedScheduler:
+    def __init__(self, feeds, state=None):
+        self.state = state if state is not None else {}
+        self.queue = []
+        now = time.time()
+        for feed_url in feeds:
+            feed_state = self.state.setdefault(feed_url, {})
+            feed_state.setdefault('interval', DEFAULT_INTERVAL)
+            next_poll = min(feed_state.get('next_poll', now), now + feed_state['interval'])
+            heapq.heappush(self.queue, (next_poll, feed_url))
+
+    # Kanály, které je na řadě
+    def due(self, now=None):
+        now = now or time.time()
+        feeds = []
+        while self.queue and self.queue[0][0] <= now:
+            feeds.append(heapq.heappop(self.queue)[1])
+        return feeds
+
+    # Počet sekund do dalšího plánovaného stažení
+    def wait_time(self, now=None):
+        if not self.queue:
+            return MAX_INTERVAL
+        return max(0.0, self.queue[0][0] - (now or time.time()))
+
+    # Úprava intervalu po stažení - podle rychlosti publikování, při chybě exponenciální odklad s náhodným rozptylem
+    def record(self, feed_url, new_items=0, error=None, now=None):
+        now = now or time.time()
+        feed_state = self.state[feed_url]
+        if error:
+            feed_state['errors'] = feed_state.get('errors', 0) + 1
+            interval = min(MAX_INTERVAL, feed_state['interval'] * 2 ** feed_state['errors'])
+            interval *= random.uniform(0.8, 1.2)
+        else:
+            feed_state['errors'] = 0
+            elapsed = now - feed_state.get('last_poll', now - feed_state['interval'])
+            rate = new_items / max(elapsed, 1.0)
+            feed_state['rate'] = RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * feed_state.get('rate', rate)
+            if feed_state['rate'] > 0:
+                interval = TARGET_ITEMS_PER_POLL / feed_state['rate']
+            else:
+                interval = feed_state['interval'] * 1.5  # Nic nového - prodloužíme interval
+            interval = min(MAX_INTERVAL, max(MIN_INTERVAL, interval))
+            feed_state['interval'] = interval
+            feed_state['last_poll'] = now
+        feed_state['next_poll'] = now + interval
+        heapq.heappush(self.queue, (feed_state['next_poll'], feed_url))
+        return interval
+
+
+# Nekonečná smyčka sledování kanálů; fetch_feed(url) kanál stáhne (běží ve vlákně), handle_results(url, výsledek)
+# výsledek uloží a vrátí počet nových položek, save_state() uloží stav plánovače
+def watch_feeds(scheduler, fetch_feed, handle_results, save_state, max_workers=8):
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            for feed_url in scheduler.due():
+                running[executor.submit(fetch_feed, feed_url)] = feed_url
+
+            if running:
+                done, _ = wait(running, timeout=scheduler.wait_time(), return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(scheduler.wait_time())
+                done = set()
+
+            for future in done:
+                feed_url = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:  # Chyba jednoho kanálu nesmí ukončit sledování
+                    interval = scheduler.record(feed_url, error=e)
+                    print(f"Chyba při stahování {feed_url}: {e} (další pokus za {interval / 60:.0f} min)")
+                    continue
+                scheduler.record(feed_url, new_items=handle_results(feed_url, result))
+            if done:
+                save_state()
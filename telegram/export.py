@@ -1,10 +1,18 @@
+import argparse
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from feedindex import INDEX_FILE, current_index
 
 # Název vstupního JSON souboru
 input_file = "feeds.json"
 
+# Soubor s indexem položek podle dne publikace (sestavuje ho rss_to_telegram.py, případně se doplní zde)
+index_file = INDEX_FILE
+
+# Formát data v položkách i na příkazové řádce
+DATE_FORMAT = '%d.%m.%Y'
+
 # Funkce pro načtení existujících dat z JSON souboru
 def load_existing_data(file_path):
     if os.path.exists(file_path):
@@ -19,9 +27,13 @@ def load_existing_data(file_path):
             return {}
     return {}
 
-# Funkce pro konverzi JSON dat do HTML pro konkrétní den a uložení do souboru podle data
+# Název výstupního HTML souboru pro den
+def html_file_for_day(target_date):
+    return f"telegram-{target_date.replace('.', '-')}.html"
+
+# Funkce pro konverzi položek jednoho dne do HTML a uložení do souboru podle data
 def convert_to_html_for_day(entries, target_date):
-    html_file = f"telegram-{target_date.replace('.', '-')}.html"
+    html_file = html_file_for_day(target_date)
     with open(html_file, "w", encoding="utf-8") as file:
         for item in entries:
             if item.get('published') == target_date:
@@ -36,22 +48,53 @@ def convert_to_html_for_day(entries, target_date):
                 file.write(f"<strong>Obsah:</strong><br>\n")
                 file.write(f"<div>{content_html}</div>\n")
                 file.write("<hr>\n")
+    return html_file
+
+# Dny od start_date do end_date včetně ve formátu DD.MM.YYYY
+def days_in_range(start_date, end_date):
+    day = datetime.strptime(start_date, DATE_FORMAT)
+    end = datetime.strptime(end_date, DATE_FORMAT)
+    while day <= end:
+        yield day.strftime(DATE_FORMAT)
+        day += timedelta(days=1)
+
+# Export rozsahu dní podle indexu - položky dne se vyberou přímo podle pozic v indexu, bez procházení všech dat.
+# Den bez položek soubor nevytváří, den, jehož soubor je novější než poslední změna jeho položek, se přeskočí
+def export_days(data, index, start_date, end_date, force=False):
+    written = []
+    for target_date in days_in_range(start_date, end_date):
+        day = index["days"].get(target_date)
+        if day is None:
+            print(f"No entries for {target_date}")
+            continue
+        html_file = html_file_for_day(target_date)
+        if not force and os.path.exists(html_file) and os.path.getmtime(html_file) >= day["updated"]:
+            print(f"HTML file for {target_date} is up to date")
+            continue
+        convert_to_html_for_day([data[source]["items"][position] for source, position in day["entries"]], target_date)
+        written.append(html_file)
+        print(f"HTML file for {target_date} successfully created.")
+    return written
 
 # Hlavní část skriptu pro generování HTML
+#   python export.py                                         - zeptá se na den
+#   python export.py --from 01.05.2024 [--to 31.05.2024]     - jeden soubor za každý den rozsahu
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export položek z feeds.json do HTML po dnech")
+    parser.add_argument('--from', dest='start', help="počáteční den DD.MM.YYYY (bez něj se program zeptá)")
+    parser.add_argument('--to', dest='end', help="koncový den DD.MM.YYYY (výchozí stejný jako --from)")
+    parser.add_argument('--force', action='store_true', help="přepsat i soubory, které jsou aktuální")
+    args = parser.parse_args()
+
     existing_data = load_existing_data(input_file)
     
-    if not isinstance(existing_data, dict):
+    if not isinstance(existing_data, dict) or not existing_data:
         print("No valid data found in the JSON file.")
         exit()
 
-    # Zeptáme se uživatele na konkrétní den
-    target_date = input("Zadejte datum ve formátu DD.MM.YYYY: ")
-    
-    all_entries = []
-    for source in existing_data:
-        all_entries.extend(existing_data[source]["items"])
-    
-    convert_to_html_for_day(all_entries, target_date)
+    # Bez --from se zeptáme uživatele na konkrétní den
+    start_date = args.start or input("Zadejte datum ve formátu DD.MM.YYYY: ")
+    end_date = args.end or start_date
 
-    print(f"HTML file for {target_date} successfully created.")
+    index = current_index(index_file, existing_data, input_file)
+    export_days(existing_data, index, start_date, end_date, args.force)
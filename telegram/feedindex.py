@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import time
+
+# Výchozí soubor s indexem položek podle dne publikace (vedle feeds.json)
+INDEX_FILE = "feeds-index.json"
+
+
+# Podpis datového souboru - podle něj se pozná, že se feeds.json od sestavení indexu změnil
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# Sestavení indexu v jednom průchodu daty: pro každý den seznam [zdroj, pořadí položky] v pořadí jako ve feeds.json
+# a otisk obsahu položek dne; čas poslední změny dne se převezme ze starého indexu, pokud se otisk nezměnil
+def build_index(data, previous=None, now=None):
+    now = now or time.time()
+    entries = {}
+    digests = {}
+    for source, channel in data.items():
+        for position, item in enumerate(channel.get("items", [])):
+            day = item.get("published", "N/A")
+            entries.setdefault(day, []).append([source, position])
+            digests.setdefault(day, hashlib.sha1()).update(
+                json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    previous_days = (previous or {}).get("days", {})
+    days = {}
+    for day, positions in entries.items():
+        digest = digests[day].hexdigest()
+        old = previous_days.get(day, {})
+        days[day] = {
+            "entries": positions,
+            "digest": digest,
+            "updated": old["updated"] if old.get("digest") == digest else now,
+        }
+    return {"days": days}
+
+
+def load_index(file_path):
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+# Uložení indexu spolu s podpisem datového souboru, ke kterému patří
+def save_index(file_path, index, data_file):
+    index = dict(index, source=file_signature(data_file))
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(index, file, ensure_ascii=False)
+    return index
+
+
+# Aktualizace indexu po uložení dat
+def update_index(file_path, data, data_file):
+    return save_index(file_path, build_index(data, load_index(file_path)), data_file)
+
+
+# Index k aktuálním datům - pokud chybí nebo patří ke starší verzi feeds.json, sestaví se znovu
+def current_index(file_path, data, data_file):
+    index = load_index(file_path)
+    if index.get("source") == file_signature(data_file) and "days" in index:
+        return index
+    return update_index(file_path, data, data_file)
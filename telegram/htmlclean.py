@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlparse
+from bs4 import BeautifulSoup
+
+# Výchozí soubor s pravidly pro odstranění opakujících se textů (patičky kanálů apod.)
+BOILERPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boilerplate.json')
+
+# Počet položek v jedné dávce posílané k vyčištění do pracovního procesu
+CHUNK_SIZE = 50
+
+
+# Pravidla pro jednotlivé značky - vrací, co se značkou udělat: 'drop' (i s obsahem), 'unwrap' (jen značku) nebo None
+def unwrap_rule(tag, soup):
+    return 'unwrap'
+
+
+def p_rule(tag, soup):
+    return 'unwrap' if tag.contents else 'drop'
+
+
+def a_rule(tag, soup):
+    return 'drop' if not tag.get('href') or not tag.contents else None
+
+
+def drop_rule(tag, soup):
+    return 'drop'
+
+
+TAG_RULES = {
+    'html': unwrap_rule,  # <html> a <body> jen rozbalit, jejich obsah zůstane
+    'body': unwrap_rule,
+    'img': drop_rule,  # Obrázky, <br> a videa i s obsahem pryč
+    'br': drop_rule,
+    'video': drop_rule,
+    'p': p_rule,  # Odstavce rozbalit, prázdné smazat
+    'a': a_rule,  # Odkazy bez adresy nebo bez obsahu smazat
+}
+
+
+# Kanál zdroje - u rss-bridge parametr username (bez @), jinak celé URL
+def channel_name(source):
+    if not source:
+        return None
+    username = parse_qs(urlparse(source).query).get('username')
+    return username[0].lstrip('@') if username else source
+
+
+# Odstraňování opakujících se textů podle pravidel z konfigurace. Pravidlo má "html" (přesný text)
+# nebo "regex" a volitelně "channels" - bez nich platí pro všechny kanály. Pravidla jednoho kanálu
+# se zkompilují jednou do jednoho regulárního výrazu
+class BoilerplateRemover:
+    def __init__(self, rules):
+        self.rules = rules
+        self.patterns = {}
+
+    @classmethod
+    def from_file(cls, file_name=BOILERPLATE_FILE):
+        if not os.path.exists(file_name):
+            return cls([])
+        with open(file_name, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def pattern(self, channel):
+        if channel not in self.patterns:
+            alternatives = [rule['regex'] if 'regex' in rule else re.escape(rule['html']) for rule in self.rules
+                            if 'channels' not in rule or channel in rule['channels']]
+            self.patterns[channel] = re.compile('|'.join(f'(?:{alternative})' for alternative in alternatives)) \
+                if alternatives else None
+        return self.patterns[channel]
+
+    def remove(self, html_content, source=None):
+        pattern = self.pattern(channel_name(source))
+        return pattern.sub('', html_content) if pattern else html_content
+
+
+# Vyčištění HTML - všechny značky se najdou jedním průchodem stromem a pravidla se pak použijí ve stejném
+# pořadí jako při postupném odstraňování (html a body, obrázky, <br>, videa, odstavce, odkazy), v rámci
+# jednoho pravidla v pořadí dokumentu. Značky uvnitř už smazané značky se přeskočí
+def clean_html(html_content, remover=None, source=None):
+    soup = BeautifulSoup(html_content, 'lxml')
+    tags = {name: [] for name in TAG_RULES}
+    for tag in soup.find_all(list(TAG_RULES)):
+        tags[tag.name].append(tag)
+    for tag in (tag for name in TAG_RULES for tag in tags[name]):
+        if tag.decomposed:
+            continue
+        action = TAG_RULES[tag.name](tag, soup)
+        if action == 'drop':
+            tag.decompose()
+        elif action == 'unwrap':
+            tag.unwrap()
+    html_content = str(soup)
+    return remover.remove(html_content, source) if remover else html_content
+
+
+# Odstraňovač opakujících se textů v pracovním procesu (nastaví ho init_worker)
+worker_remover = None
+
+
+def init_worker(rules):
+    global worker_remover
+    worker_remover = BoilerplateRemover(rules)
+
+
+# Vyčištění dávky položek v pracovním procesu; položky se vrací ve stejném pořadí
+def clean_entries(entries):
+    for entry in entries:
+        entry['content_html'] = clean_html(entry['content_html'], worker_remover, entry['source'])
+    return entries
+
+
+# Čištění HTML položek ve více procesech po dávkách - parsování HTML vytíží procesor, takže při stahování
+# celé historie kanálu běží na všech jádrech. Procesy se spouští metodou spawn, protože stahování běží
+# ve vláknech a fork procesu s vlákny není bezpečný
+class CleaningPool:
+    def __init__(self, processes=None, chunk_size=CHUNK_SIZE, remover=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=init_worker, initargs=(remover.rules if remover else [],))
+
+    # Vyčištěné položky v původním pořadí, jakmile je hotová jejich dávka; rozpracovaných dávek je nejvýše
+    # dvakrát víc než procesů, takže se položky čtou ze zdroje jen o málo napřed
+    def clean(self, entries):
+        pending = deque()
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) >= self.chunk_size:
+                pending.append(self.executor.submit(clean_entries, chunk))
+                chunk = []
+            while len(pending) >= 2 * self.processes:
+                yield from pending.popleft().result()
+        if chunk:
+            pending.append(self.executor.submit(clean_entries, chunk))
+        while pending:
+            yield from pending.popleft().result()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
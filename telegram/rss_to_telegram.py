@@ -1,14 +1,51 @@
+import argparse
 import feedparser
 import json
 import os
+import sys
 import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from bs4 import BeautifulSoup
 from source import rss_sources
+from feedindex import INDEX_FILE, update_index
+from htmlclean import CHUNK_SIZE, BoilerplateRemover, CleaningPool, clean_html
+
+# Společné moduly pro mediacheck i telegram
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'common'))
+from feedstream import FeedStreamError, iter_body, iter_entries
+from feedhealth import FeedHealth, load_health, save_health, with_retries
+from httpclient import default_client as http_client
+from ratelimit import HostRateLimiter, retry_after_seconds
 
 # Název výstupního JSON souboru
 output_file = "feeds.json"
 
+# Soubor s indexem položek podle dne publikace pro export
+index_file = INDEX_FILE
+
+# Soubor s ID již uložených položek každého kanálu
+seen_file = "seen-ids.json"
+
+# Soubor se zdravím zdrojů (chyby v řadě, poslední úspěch, průměrná doba stažení)
+health_file = "feed-health.json"
+
+# Nejvyšší povolená rychlost požadavků na jeden server (všechny zdroje jdou přes rss-bridge.org) -
+# jeden požadavek za 10 sekund jako dřívější pauza mezi zdroji, ale zpracování už na pauzu nečeká
+REQUESTS_PER_SECOND = 0.1
+BURST = 1
+
+# Počet souběžně zpracovávaných zdrojů
+MAX_WORKERS = 4
+
+# Odklad, pokud server vrátí 429/503 bez hlavičky Retry-After (v sekundách)
+DEFAULT_RETRY_AFTER = 60
+
+rate_limiter = HostRateLimiter(REQUESTS_PER_SECOND, BURST)
+
+# Pravidla pro opakující se texty kanálů, zkompilovaná jednou pro celý běh
+boilerplate = BoilerplateRemover.from_file()
+
 # Funkce pro načtení existujících dat z JSON souboru
 def load_existing_data(file_path):
     if os.path.exists(file_path):
@@ -28,6 +65,29 @@ def save_data(file_path, data):
     with open(file_path, "w", encoding="utf-8") as file:
         json.dump(data, file, ensure_ascii=False, indent=4)
 
+# Funkce pro načtení ID již uložených položek po kanálech; doplní se o ID z feeds.json,
+# takže index vznikne i u dat uložených před jeho zavedením
+def load_seen_ids(file_path, existing_data):
+    seen = {source: set(ids) for source, ids in load_existing_data(file_path).items()}
+    for source, channel in existing_data.items():
+        seen.setdefault(source, set()).update(item.get('id') for item in channel.get('items', []))
+    return seen
+
+# Funkce pro uložení indexu ID
+def save_seen_ids(file_path, seen):
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump({source: sorted(ids) for source, ids in seen.items()}, file, ensure_ascii=False)
+
+# Funkce pro odstranění duplicitních položek (stejné ID) uložených dřívějšími běhy
+def remove_duplicate_items(existing_data):
+    removed = 0
+    for channel in existing_data.values():
+        items = channel.get('items', [])
+        unique_ids = set()
+        channel['items'] = [item for item in items if not (item.get('id') in unique_ids or unique_ids.add(item.get('id')))]
+        removed += len(items) - len(channel['items'])
+    return removed
+
 # Funkce pro převod data na formát DD.MM.YYYY
 def format_date(date_str):
     try:
@@ -36,76 +96,90 @@ def format_date(date_str):
     except ValueError:
         return date_str
 
-# Funkce pro odstranění specifických HTML tagů a všech <br>, a konkrétního sousloví
-def clean_html_content(html_content):
-    soup = BeautifulSoup(html_content, 'lxml')
-
-    # Odstranění tagů <html> a <body> pouze pokud jsou na začátku nebo konci dokumentu
-    for tag in ['html', 'body']:
-        for element in soup.find_all(tag):
-            if element == soup.html or element == soup.body:
-                element.unwrap()
-            else:
-                element.decompose()
-
-    # Odstranění obrázků
-    for img in soup.find_all('img'):
-        img.decompose()  # Odstraní obrázek
-
-    # Odstranění všech <br> tagů
-    for br in soup.find_all('br'):
-        br.decompose()
-
-    # Odstranění <video> tagů a veškerého jejich obsahu
-    for video in soup.find_all('video'):
-        video.decompose()
-
-    # Odstranění obalujících <p> tagů, ale ne jejich obsahu
-    for p in soup.find_all('p'):
-        if not p.contents:
-            p.decompose()
-        else:
-            p.unwrap()  # Pokud <p> tag obsahuje nějaký obsah, odstraníme pouze tag, obsah zůstane
-
-    # Odstranění prázdných <a> tagů
-    for a in soup.find_all('a'):
-        if not a.get('href') or not a.contents:
-            a.decompose()  # Odstraní prázdné <a> tagy
-
-    # Odstranění konkrétního sousloví
-    unwanted_phrase = ('Sledujte a zdieľajte<a href="https://t.me/casusbellilive" rel="noopener" '
-                       'target="_blank">https://t.me/casusbellilive</a>| <a href="https://youtube.com/@casusbellilivenew" '
-                       'rel="noopener" target="_blank">YOUTUBE</a> | <a href="https://odysee.com/@casusbelli:6" '
-                       'rel="noopener" target="_blank">ODYSEE</a> | <a href="https://t.me/casusbellichat" rel="noopener" '
-                       'target="_blank">CB CHAT</a> | <a href="https://t.me/CasusBellihistory" rel="noopener" '
-                       'target="_blank">CB HISTORY</a> | <a href="https://matrix.casusbelli.live/" rel="noopener" '
-                       'target="_blank">CB Matrix</a> | <a href="http://t.me/CasusBelliLiveBot" rel="noopener" '
-                       'target="_blank">CONTACT</a> | <a href="https://t.me/casusbelliarchiv" rel="noopener" '
-                       'target="_blank">CB ARCHIV</a> | <a href="https://www.resistance.sk/shop/sk/2-domov" '
-                       'rel="noopener" target="_blank">SHOP</a>')
-
-    html_content = str(soup).replace(unwanted_phrase, '')
-
-    return html_content
-
-# Funkce pro zpracování jednoho RSS zdroje
-def process_rss(url):
-    print(f"Processing source: {url}")
-    feed = feedparser.parse(url)
-    entries = []
-    for entry in feed.entries:
+# Funkce pro vyčištění HTML obsahu - odstranění obrázků, <br>, videí, obalujících <p> a prázdných odkazů
+# v jednom průchodu stromem a opakujících se textů kanálů podle boilerplate.json
+def clean_html_content(html_content, source=None):
+    return clean_html(html_content, boilerplate, source)
+
+# Požadavek s ohledem na limit rychlosti serveru; při 429/503 se celý server pozdrží podle Retry-After
+def rate_limited(func, url):
+    rate_limiter.acquire(url)
+    try:
+        return func(url)
+    except urllib.error.HTTPError as e:
+        if e.code in (429, 503):
+            delay = retry_after_seconds(e.headers)
+            rate_limiter.block(url, DEFAULT_RETRY_AFTER if delay is None else delay)
+        raise
+
+# Stažení a zpracování celého zdroje přes feedparser (relativní odkazy se doplní podle adresy zdroje);
+# všechny zdroje přes rss-bridge sdílejí jedno spojení keep-alive
+def parse_source(url):
+    status, headers, body, transferred = http_client.get(url)
+    headers = {key.lower(): value for key, value in headers.items()}
+    headers.setdefault('content-location', url)
+    return feedparser.parse(body, response_headers=headers)
+
+# Proudové čtení položek zdroje - položky se zpracovávají už během stahování a paměť nezávisí na velikosti kanálu.
+# Pokud zdroj nejde zpracovat proudově, zbylé položky se načtou přes feedparser
+def stream_entries(url):
+    returned = set()
+    try:
+        with with_retries(rate_limited, http_client.open, url) as response:
+            for entry in iter_entries(iter_body(response), url):
+                returned.add(entry.get('id', entry.get('link')))
+                yield entry
+    except FeedStreamError as e:
+        print(f"Source {url} cannot be streamed ({e}), falling back to feedparser")
+        for entry in with_retries(rate_limited, parse_source, url).entries:
+            if entry.get('id', entry.get('link')) not in returned:
+                yield entry
+
+# Nové položky zdroje s dosud nevyčištěným HTML; položky s ID v seen_ids se přeskočí ještě před čištěním
+def read_entries(url, stream=False, seen_ids=frozenset()):
+    skipped = 0
+    for entry in (stream_entries(url) if stream else with_retries(rate_limited, parse_source, url).entries):
+        entry_id = entry.get('id', entry.get('link', 'N/A'))
+        if entry_id in seen_ids:
+            skipped += 1
+            continue
         print(f"Processing entry with ID: {entry.id}")
-        entry_data = {
+        yield {
             "source": url,  # Přidáme URL zdroje, abychom věděli, odkud položka pochází
-            "id": entry.get('id', entry.get('link', 'N/A')),
+            "id": entry_id,
             "author": {
                 "name": entry.get('author', 'Unknown')
             },
             "published": format_date(entry.get('published', 'N/A')),
             "url": entry.get('link', 'N/A'),
-            "content_html": clean_html_content(entry.get('content', [{'value': entry.get('summary', 'No content available')}])[0].get('value', 'No content available'))
+            "content_html": entry.get('content', [{'value': entry.get('summary', 'No content available')}])[0].get('value', 'No content available')
         }
-        entries.append(entry_data)
+    if skipped:
+        print(f"Skipped {skipped} already stored entries from {url}")
+
+# Funkce pro zpracování jednoho RSS zdroje; s pool se HTML čistí v pracovních procesech (pořadí položek zůstává)
+def process_rss(url, stream=False, seen_ids=frozenset(), pool=None):
+    print(f"Processing source: {url}")
+    entries = read_entries(url, stream, seen_ids)
+    if pool is not None:
+        return list(pool.clean(entries))
+    return [dict(entry, content_html=clean_html_content(entry['content_html'], url)) for entry in entries]
+
+# Zpracování zdroje s ohledem na jeho zdraví - zdroj, který opakovaně selhává, se až do konce vychladnutí
+# přeskakuje, chyba jednoho zdroje nesmí shodit celý běh; vrací seznam položek
+def process_source(source, health, stream=False, seen_ids=frozenset(), pool=None):
+    if not health.allow(source):
+        print(f"Skipping failing source: {source}")
+        return []
+    start = time.perf_counter()
+    try:
+        entries = process_rss(source, stream, seen_ids, pool)
+    except Exception as e:
+        print(f"Error processing {source}: {e}")
+        if health.record_failure(source, e):
+            print(f"Source {source} keeps failing, skipping it for a while")
+        return []
+    health.record_success(source, time.perf_counter() - start)
     return entries
 
 # Funkce pro seřazení položek podle data publikace
@@ -115,32 +189,78 @@ def sort_entries_by_date(entries):
     except ValueError:
         return entries
 
+# Funkce pro zařazení seřazených položek zpět podle kanálů; položka, která už v kanálu je, se přeskočí
+def merge_entries(existing_data, seen, entries):
+    for entry in entries:
+        source = entry["source"]
+        if source not in existing_data:
+            existing_data[source] = {"items": []}
+        if entry["id"] in seen.setdefault(source, set()):
+            continue  # Stejná položka se v kanálu objevila vícekrát
+        seen[source].add(entry["id"])
+        existing_data[source]["items"].append(entry)
+
+# Stažení celé historie kanálů - HTML se čistí ve více procesech a každý zdroj se uloží, jakmile je hotový,
+# takže přerušený běh o už zpracované zdroje nepřijde. Řazení po zdrojích dává stejné pořadí položek
+# v kanálu jako řazení všech položek najednou
+def backfill(sources, health, seen, existing_data, stream=False, workers=MAX_WORKERS, processes=None, chunk_size=None):
+    with CleaningPool(processes, chunk_size or CHUNK_SIZE, boilerplate) as pool, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(process_source, source, health, stream, seen.get(source, frozenset()), pool): source
+                   for source in sources}
+        for future in as_completed(futures):
+            new_entries = future.result()
+            merge_entries(existing_data, seen, sort_entries_by_date(new_entries))
+            save_data(output_file, existing_data)
+            save_seen_ids(seen_file, seen)
+            print(f"Stored {len(new_entries)} entries from {futures[future]}")
+
 # Hlavní část skriptu pro stahování a ukládání dat
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stažení RSS zdrojů do feeds.json")
+    parser.add_argument('--stream', action='store_true', help="parsovat zdroje proudově (nízká paměť u velkých kanálů)")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="počet souběžně zpracovávaných zdrojů")
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND, help="nejvýše požadavků za sekundu na jeden server")
+    parser.add_argument('--burst', type=int, default=BURST, help="kolik požadavků na server smí odejít najednou")
+    parser.add_argument('--backfill', action='store_true',
+                        help="stažení celé historie - HTML se čistí ve více procesech, zdroje se ukládají průběžně")
+    parser.add_argument('--processes', type=int, help="počet procesů pro čištění HTML při --backfill (výchozí počet jader)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="počet položek v jedné dávce pro proces")
+    args = parser.parse_args()
+
     existing_data = load_existing_data(output_file)
     
     if not isinstance(existing_data, dict):
         existing_data = {}
 
-    all_entries = []
-    for index, source in enumerate(rss_sources):
-        new_entries = process_rss(source)
-        all_entries.extend(new_entries)
-        
-        # Pauza 10 sekund mezi zpracováním jednotlivých zdrojů
-        if index < len(rss_sources) - 1:  # Vyhnout se pauze po posledním zdroji
-            print("Waiting for 10 seconds before processing the next source...")
-            time.sleep(10)
-
-    sorted_entries = sort_entries_by_date(all_entries)
-    
-    # Rozdělení seřazených položek zpět podle kanálů pro JSON
-    for entry in sorted_entries:
-        source = entry["source"]
-        if source not in existing_data:
-            existing_data[source] = {"items": []}
-        existing_data[source]["items"].append(entry)
+    removed = remove_duplicate_items(existing_data)
+    if removed:
+        print(f"Removed {removed} duplicate entries from {output_file}")
+    seen = load_seen_ids(seen_file, existing_data)
+
+    health_state = load_health(health_file)
+    health = FeedHealth(health_state)
+
+    # Zdroje se zpracovávají souběžně, rychlost požadavků na každý server hlídá token bucket
+    rate_limiter = HostRateLimiter(args.rate, args.burst)
+    if args.backfill:
+        backfill(rss_sources, health, seen, existing_data, args.stream, args.workers, args.processes, args.chunk_size)
+    else:
+        all_entries = []
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            for new_entries in executor.map(
+                    lambda source: process_source(source, health, args.stream, seen.get(source, frozenset())), rss_sources):
+                all_entries.extend(new_entries)
+
+        # Rozdělení seřazených položek zpět podle kanálů pro JSON
+        merge_entries(existing_data, seen, sort_entries_by_date(all_entries))
     
     save_data(output_file, existing_data)
+    save_seen_ids(seen_file, seen)
+    update_index(index_file, existing_data, output_file)
+    save_health(health_state, health_file)
+    stats = http_client.snapshot()
+    print(f"HTTP: {stats['requests']} requests, {stats['connections']} connections "
+          f"({stats['reused']} reused), {stats['bytes']} bytes")
     
     print("Data successfully saved to JSON.")